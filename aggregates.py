@@ -0,0 +1,37 @@
+"""
+Agregasi yang tidak bisa dijawab dari cube saja (kuantil, describe, jumlah data),
+di-memoize per versi dataset dan argumen.
+"""
+import pandas as pd
+
+from cube import get_cube, rollup
+from memo import memoize
+from sketch import get_sketch, quantile_name, quantiles
+from summary import get_summary, lookup
+
+
+@memoize()
+def count_per_station(df):
+    return df["station"].value_counts()
+
+
+@memoize()
+def station_statistics(df, columns=("PM2.5", "PM10", "NO2"), qs=(0.5, 0.9, 0.99)):
+    """
+    Mean, kuantil ``qs`` (median, p90, p99), max dan min per stasiun dengan kolom
+    berformat ``<kolom>_<stat>``. Mean, max dan min dari cube, kuantil dari sketch
+    (perkiraan, galat relatif paling besar ``sketch.RELATIVE_ACCURACY``).
+    """
+    columns = list(columns)
+    stats = pd.concat([rollup(get_cube(df), "station", columns), quantiles(get_sketch(df), "station", columns, qs)], axis=1)
+    order = ["mean", *(quantile_name(q) for q in qs), "max", "min"]
+    return stats[[f"{col}_{stat}" for col in columns for stat in order]].reset_index()
+
+
+@memoize()
+def describe(df, station=None, exclude=()):
+    """
+    ``df.describe()`` untuk seluruh data atau satu stasiun, diambil dari ringkasan
+    yang dihitung sekali per versi dataset (lihat ``summary``).
+    """
+    return lookup(get_summary(df), station, exclude)
@@ -0,0 +1,199 @@
+"""
+Indeks Kualitas Udara (AQI) per jam menurut standar China HJ 633-2012.
+
+Sub-indeks (IAQI) tiap polutan dihitung sekaligus untuk semua baris: posisi konsentrasi
+di tabel breakpoint dicari dengan ``np.searchsorted``, lalu IAQI diinterpolasi linear di
+antara dua breakpoint. AQI adalah IAQI terbesar, dan polutan penentunya menjadi polutan
+utama bila AQI > 50.
+
+Per (station, year, month) disimpan akumulator AQI: jumlah AQI per jam, jam per kategori
+dan jam per polutan utama. Semua kolomnya jumlahan, jadi akumulator dihitung sekali per
+versi dataset, disimpan di ``<CACHE_DIR>/aqi/<versi>.parquet`` dan saat ingest cukup
+digabung dengan akumulator batch baru (``merge_aqi_tables``), seperti cube.
+Ringkasan per stasiun/bulan untuk peta stasiun dan view per stasiun (``aqi_summary``)
+di-rollup dari akumulator ini tanpa memindai ulang kolom polutan.
+
+Stasiun di dataset ini ada di Beijing dan satuan semua polutan µg/m³, sehingga dipakai
+tabel HJ 633-2012 (bukan US EPA yang memakai ppb). PM2.5 dan PM10 hanya punya tabel
+24 jam; seperti AQI real-time resmi, konsentrasi per jam langsung dibandingkan dengan
+tabel itu.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from cube import BATCH_ROWS, ENGINE, IN_MEMORY_ROWS, MERGE_EVERY
+from data_cache import CACHE_DIR
+from dataset import concat_frames
+from memo import PersistedArtifact, memoize
+
+POLLUTANTS = ["PM2.5", "PM10", "SO2", "NO2", "CO", "O3"]
+IAQI = np.array([0, 50, 100, 150, 200, 300, 400, 500], dtype="float64")
+BREAKPOINTS = {
+    "PM2.5": [0, 35, 75, 115, 150, 250, 350, 500],  # 24 jam
+    "PM10": [0, 50, 150, 250, 350, 420, 500, 600],  # 24 jam
+    "SO2": [0, 150, 500, 650, 800, 1600, 2100, 2620],  # 1 jam sampai 800, di atasnya tabel 24 jam
+    "NO2": [0, 100, 200, 700, 1200, 2340, 3090, 3840],  # 1 jam
+    "CO": [0, 5000, 10000, 35000, 60000, 90000, 120000, 150000],  # 1 jam (tabel asli dalam mg/m³)
+    "O3": [0, 160, 200, 300, 400, 800, 1000, 1200],  # 1 jam
+}
+
+# Kategori: AQI <= 50 Baik, <= 100 Sedang, ..., > 300 Berbahaya
+CATEGORY_EDGES = np.array([50, 100, 150, 200, 300])
+CATEGORIES = ["Baik", "Sedang", "Tercemar ringan", "Tercemar sedang", "Tercemar berat", "Berbahaya"]
+CATEGORY_RANGES = ["0-50", "51-100", "101-150", "151-200", "201-300", "> 300"]
+CATEGORY_COLORS = ["green", "yellow", "orange", "red", "purple", "maroon"]
+
+GROUP_KEYS = ["station", "year", "month"]
+PRIMARY_COLUMNS = [f"primary_{col}" for col in POLLUTANTS]  # jam per polutan utama di akumulator
+
+
+def sub_index(values, breakpoints):
+    """
+    IAQI satu polutan untuk array konsentrasi ``values``. Konsentrasi di atas breakpoint
+    terakhir dihitung 500, nilai negatif 0, dan NaN tetap NaN.
+    """
+    bp = np.asarray(breakpoints, dtype="float64")
+    slope = np.diff(IAQI) / np.diff(bp)
+    intercept = IAQI[:-1] - slope * bp[:-1]
+    c = np.clip(values, 0, bp[-1])
+    # Cukup cari di breakpoint dalam: hasilnya langsung indeks segmen 0 .. len(bp) - 2
+    i = np.searchsorted(bp[1:-1], c, side="right")
+    return intercept[i] + slope[i] * c
+
+
+def category_codes(aqi):
+    """
+    Kode kategori (indeks CATEGORIES) tiap nilai AQI, -1 bila NaN.
+    """
+    aqi = np.asarray(aqi, dtype="float64")
+    return np.where(np.isnan(aqi), -1, np.searchsorted(CATEGORY_EDGES, aqi, side="left")).astype("int8")
+
+
+def build_aqi(df):
+    """
+    Kolom ``AQI`` (float32), ``category`` dan ``primary`` (polutan utama) tiap baris
+    ``df``. Baris tanpa satu pun polutan bernilai NaN tanpa kategori.
+    """
+    aqi, primary = np.full(len(df), np.nan), np.full(len(df), -1, dtype="int8")
+    for code, col in enumerate(POLLUTANTS):
+        iaqi = sub_index(df[col].to_numpy(dtype="float64", na_value=np.nan), BREAKPOINTS[col])
+        # Seri dimenangkan polutan yang lebih awal di POLLUTANTS
+        higher = iaqi > np.fmax(aqi, -1)
+        aqi = np.where(higher, iaqi, aqi)
+        primary[higher] = code
+    primary[~(aqi > 50)] = -1
+    return pd.DataFrame({
+        "AQI": aqi.astype("float32"),
+        "category": pd.Categorical.from_codes(category_codes(aqi), CATEGORIES),
+        "primary": pd.Categorical.from_codes(primary, POLLUTANTS),
+    })
+
+
+def build_aqi_table(df):
+    """
+    Akumulator AQI per (station, year, month) dari data per jam: ``AQI_sum`` (jumlah AQI
+    jam yang punya AQI), jam per kategori (satu kolom per CATEGORIES) dan jam per polutan
+    utama (PRIMARY_COLUMNS).
+    """
+    groups = df[GROUP_KEYS].groupby(GROUP_KEYS, observed=True, sort=True)
+    group = groups.ngroup().to_numpy()
+    index = groups.size().index
+    size = len(index)
+    hourly = build_aqi(df[POLLUTANTS])
+
+    aqi = hourly["AQI"].to_numpy(dtype="float64", na_value=np.nan)
+    valid = ~np.isnan(aqi)
+    category = hourly["category"].cat.codes.to_numpy()
+    hours = np.bincount(group[valid] * len(CATEGORIES) + category[valid],
+                        minlength=size * len(CATEGORIES)).reshape(size, len(CATEGORIES))
+
+    primary = hourly["primary"].cat.codes.to_numpy()
+    has_primary = primary >= 0
+    primary_hours = np.bincount(group[has_primary] * len(POLLUTANTS) + primary[has_primary],
+                                minlength=size * len(POLLUTANTS)).reshape(size, len(POLLUTANTS))
+
+    table = pd.concat([
+        pd.Series(np.bincount(group[valid], aqi[valid], minlength=size), index=index, name="AQI_sum"),
+        pd.DataFrame(hours.astype("int32"), index=index, columns=CATEGORIES),
+        pd.DataFrame(primary_hours.astype("int32"), index=index, columns=PRIMARY_COLUMNS),
+    ], axis=1).reset_index()
+    table.attrs = {"version": df.attrs.get("version"), "sorted_by": "station"}
+    return table
+
+
+def merge_aqi_tables(tables):
+    """
+    Gabungkan akumulator beberapa batch (mis. akumulator lama dan batch data baru).
+    """
+    merged = concat_frames(tables).groupby(GROUP_KEYS, observed=True, sort=True).sum().reset_index()
+    merged.attrs = {"version": None, "sorted_by": "station"}
+    return merged
+
+
+def build_aqi_chunked(files, batch_rows=BATCH_ROWS):
+    """
+    Akumulator dari file Parquet yang dibaca per batch lalu digabung.
+    """
+    columns = [*GROUP_KEYS, *POLLUTANTS]
+    parts = []
+    for path in files:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            parts.append(build_aqi_table(batch.to_pandas()))
+            if len(parts) >= MERGE_EVERY:
+                parts = [merge_aqi_tables(parts)]
+    return merge_aqi_tables(parts)
+
+
+def _build(df):
+    files = getattr(df, "files", None)
+    if files is None or ENGINE == "pandas" or (ENGINE == "auto" and len(df) <= IN_MEMORY_ROWS):
+        table = build_aqi_table(df)
+    else:
+        table = build_aqi_chunked(files)
+    table.attrs["version"] = df.attrs.get("version")
+    return table
+
+
+_tables = PersistedArtifact("aqi.get_aqi_table", "aqi_table", CACHE_DIR / "aqi", _build)
+
+
+def aqi_table_path(version):
+    return _tables.path(version)
+
+
+def save_aqi_table(table):
+    """
+    Simpan akumulator ke disk (atomik) dan ke memori untuk versi ``table.attrs["version"]``.
+    """
+    return _tables.save(table)
+
+
+def get_aqi_table(df):
+    """
+    Akumulator untuk versi dataset ``df.attrs["version"]``: dari memori, dari disk,
+    atau dibangun sekali lalu disimpan.
+    """
+    return _tables.get(df)
+
+
+@memoize(maxsize=8, ttl=None)
+def aqi_summary(df, by=("station",)):
+    """
+    Ringkasan AQI per grup ``by`` (bagian dari ``("station", "year", "month")``):
+    rata-rata AQI per jam, kategori rata-rata itu, polutan utama yang paling sering,
+    lalu jumlah jam per kategori (satu kolom per CATEGORIES).
+    """
+    sums = get_aqi_table(df).groupby(list(by), observed=True, sort=True)[
+        ["AQI_sum", *CATEGORIES, *PRIMARY_COLUMNS]].sum()
+    hours = sums[CATEGORIES].to_numpy()
+    count = hours.sum(axis=1)
+    mean = sums["AQI_sum"].to_numpy() / np.where(count > 0, count, np.nan)
+    primary_hours = sums[PRIMARY_COLUMNS].to_numpy()
+    top = np.where(primary_hours.any(axis=1), primary_hours.argmax(axis=1), -1)
+
+    summary = pd.DataFrame(hours, index=sums.index, columns=CATEGORIES)
+    summary.insert(0, "AQI", mean)
+    summary.insert(1, "category", pd.Categorical.from_codes(category_codes(mean), CATEGORIES))
+    summary.insert(2, "primary", pd.Categorical.from_codes(top, POLLUTANTS))
+    return summary
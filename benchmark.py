@@ -0,0 +1,371 @@
+"""
+Benchmark dashboard dengan data sintetis berskema sama dengan dataset Beijing
+(``No, year, month, day, hour, PM2.5 ... WSPM, wd, station``).
+
+Untuk tiap skala (jumlah baris) data sintetis dibuat sekali di ``AQ_BENCH_DIR``,
+lalu dashboard dijalankan dengan Streamlit AppTest memakai data itu sebagai mirror
+offline dan cache kosong, dengan pengukuran ``profiling`` aktif. Tiap menu dibuka
+sekali, seperti pengguna berpindah menu, dan dari span rerun itu dicatat per view
+(fungsi ``@view`` di dashboard, jadi view baru otomatis ikut diukur):
+
+- ``compute``: self-time fase load dan aggregate di view (cache agregasi masih kosong)
+- ``render``: self-time fase render, serialize dan sisa waktu view (matplotlib/folium,
+  kirim ke browser)
+- ``rerun``: waktu seluruh rerun beserta puncak memori (tracemalloc, memperlambat
+  rerun; matikan dengan ``--no-memory`` untuk waktu yang lebih akurat)
+
+Hasil ditambahkan ke ``benchmarks/results.jsonl`` sehingga bisa dibandingkan antar
+perubahan::
+
+    python benchmark.py run --rows 420000 4000000 40000000 --stations 12
+    python benchmark.py compare
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = Path(os.environ.get("AQ_BENCH_DIR", ".cache/bench"))
+RESULTS = Path(os.environ.get("AQ_BENCH_RESULTS", "benchmarks/results.jsonl"))
+SCALES = [420_000, 4_000_000, 40_000_000]
+START = "2013-03-01"
+REGRESSION_RATIO = 1.2
+
+# File data yang dibaca tiap dashboard (nama file di mirror)
+APPS = {
+    "dashboard2.py": "air_quality_all.csv",
+    "dashboard3.py": "air_quality_all.zip",
+    "dashboard8.py": "air_quality_all.csv",
+}
+
+# Rata-rata dan simpangan baku kira-kira dataset asli
+DISTRIBUTIONS = {
+    "PM2.5": (80, 70), "PM10": (100, 80), "SO2": (15, 20), "NO2": (50, 30), "CO": (1200, 1000),
+    "O3": (57, 50), "TEMP": (13, 11), "PRES": (1010, 10), "DEWP": (2, 13), "RAIN": (0.06, 0.8), "WSPM": (1.7, 1.2),
+}
+MISSING_RATE = 0.02
+
+
+def station_names(count):
+    from station_map import DEFAULT_STATIONS_FILE, station_locations
+
+    names = list(station_locations(DEFAULT_STATIONS_FILE).index)
+    return (names + [f"Station{i:04d}" for i in range(len(names) + 1, count + 1)])[:count]
+
+
+def write_locations(names, path, seed):
+    """
+    File koordinat untuk stasiun sintetis: stasiun asli di koordinatnya, sisanya acak di
+    sekitar Beijing, sehingga peta menampilkan semua stasiun (dan memakai cluster bila banyak).
+    """
+    from station_map import DEFAULT_STATIONS_FILE, station_locations
+
+    known = station_locations(DEFAULT_STATIONS_FILE)
+    rng = np.random.default_rng(seed)
+    locations = pd.DataFrame({"lat": rng.uniform(39.4, 40.6, len(names)), "lon": rng.uniform(115.8, 117.0, len(names))},
+                             index=pd.Index(names, name="station"))
+    locations.update(known)
+    locations.round(4).to_csv(path)
+
+
+def synthetic_station(code, names, hours, rng):
+    """
+    Data per jam sintetis untuk satu stasiun dengan tipe data yang sama seperti ``dataset.DTYPES``.
+    """
+    from dataset import NUMERIC_COLUMNS, WIND_DIRECTIONS
+
+    time_index = pd.date_range(START, periods=hours, freq="h")
+    frame = {
+        "No": np.arange(1, hours + 1, dtype="int32"),
+        "year": time_index.year.to_numpy().astype("int16"),
+        "month": time_index.month.to_numpy().astype("int8"),
+        "day": time_index.day.to_numpy().astype("int8"),
+        "hour": time_index.hour.to_numpy().astype("int8"),
+    }
+    for col in NUMERIC_COLUMNS:
+        mean, sd = DISTRIBUTIONS[col]
+        values = rng.normal(mean, sd, hours).round(1).astype("float32")
+        values[rng.random(hours) < MISSING_RATE] = np.nan
+        frame[col] = values
+    wd = rng.integers(0, len(WIND_DIRECTIONS), hours)
+    wd[rng.random(hours) < MISSING_RATE / 4] = -1
+    frame["wd"] = pd.Categorical.from_codes(wd, WIND_DIRECTIONS)
+    frame["station"] = pd.Categorical.from_codes(np.full(hours, code), names)
+    return pd.DataFrame(frame)
+
+
+def ensure_data(rows, stations, seed, filename):
+    """
+    Buat (sekali) file data sintetis ``filename`` (.parquet, .csv atau .zip berisi CSV)
+    dengan ``rows`` baris dibagi rata ke ``stations`` stasiun, ditulis per stasiun agar
+    memori tetap kecil.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from dataset import COMPRESSION
+
+    directory = BENCH_DIR / f"data-{rows}-{stations}-{seed}"
+    path = directory / filename
+    names = station_names(stations)
+    directory.mkdir(parents=True, exist_ok=True)
+    if not (directory / "stations.csv").exists():
+        write_locations(names, directory / "stations.csv", seed)
+    if path.exists():
+        return directory
+    # Gambar header dashboard juga diambil dari mirror
+    shutil.copyfile(Path(__file__).resolve().parent / "air_quality_bg.jpg", directory / "air_quality_bg.jpg")
+
+    rng = np.random.default_rng(seed)
+    tmp = path.with_suffix(".tmp")
+    writer = None
+    for code in range(stations):
+        hours = rows // stations + (code < rows % stations)
+        frame = synthetic_station(code, names, hours, rng)
+        if path.suffix == ".parquet":
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema, compression=COMPRESSION)
+            writer.write_table(table, row_group_size=len(frame))
+        else:
+            frame.to_csv(tmp, mode="a", header=code == 0, index=False)
+    if writer is not None:
+        writer.close()
+    if path.suffix == ".zip":
+        # Seperti ZIP di GitHub: satu file CSV di dalam arsip
+        archive_tmp = path.with_suffix(".zip.tmp")
+        with zipfile.ZipFile(archive_tmp, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.write(tmp, path.with_suffix(".csv").name)
+        os.remove(tmp)
+        tmp = archive_tmp
+    os.replace(tmp, path)
+    return directory
+
+
+class Recorder:
+    """
+    Catat durasi dan puncak memori tiap fase sebagai record hasil benchmark.
+    """
+
+    def __init__(self, base, memory=True):
+        self.base = base
+        self.memory = memory
+        self.records = []
+
+    def timed(self, fn):
+        """
+        (hasil, detik, puncak memori MB, tambahan memori MB di atas memori awal fase).
+        """
+        if self.memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - start
+        if not self.memory:
+            return result, seconds, None, None
+        peak = tracemalloc.get_traced_memory()[1]
+        return result, seconds, peak / 1e6, (peak - before) / 1e6
+
+    def record(self, view, phase, seconds, peak_mb=None, alloc_mb=None):
+        rounded = lambda value, digits: None if value is None else round(value, digits)
+        self.records.append({**self.base, "view": view, "phase": phase, "seconds": rounded(seconds, 4),
+                             "peak_mb": rounded(peak_mb, 1), "alloc_mb": rounded(alloc_mb, 1)})
+        print(f"{view:32s} {phase:8s}" + ("" if seconds is None else f" {seconds:8.3f}s")
+              + ("" if peak_mb is None else f" {peak_mb:9.1f} MB") + ("" if alloc_mb is None else f" (+{alloc_mb:.1f} MB)"), flush=True)
+
+    def measure(self, view, phase, fn):
+        result, *stats = self.timed(fn)
+        self.record(view, phase, *stats)
+        return result
+
+
+def read_spans(path, offset=0):
+    """
+    Span yang ditulis ``profiling`` ke file trace ``path`` mulai byte ``offset``.
+    """
+    with open(path, encoding="utf-8") as f:
+        f.seek(offset)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def view_phases(spans):
+    """
+    Self-time per view (label ``@view`` di dashboard, "page" di luar view): ``compute``
+    (fase load dan aggregate) dan ``render`` (render, serialize dan sisa waktu view).
+    """
+    totals = {}
+    for s in spans:
+        if s["phase"] == "total":
+            continue
+        phases = totals.setdefault(s["view"], {"compute": 0.0, "render": 0.0})
+        phases["compute" if s["phase"] in ("load", "aggregate") else "render"] += s["self_seconds"]
+    return totals
+
+
+def run_scale(rows, stations, app, seed, memory, run_id):
+    """
+    Satu skala dalam proses sendiri: env cache harus diset sebelum modul dashboard diimpor.
+    """
+    filename = APPS[app]
+    data_dir = BENCH_DIR / f"data-{rows}-{stations}-{seed}"
+    cache_dir = tempfile.mkdtemp(prefix="aq-bench-")
+    trace = Path(cache_dir) / "trace.jsonl"
+    os.environ.update(AQ_CACHE_DIR=cache_dir, AQ_OFFLINE="1", AQ_MIRROR_DIR=str(data_dir.resolve()),
+                      AQ_STATIONS_FILE=str((data_dir / "stations.csv").resolve()),
+                      AQ_DEBUG="1", AQ_TRACE_FILE=str(trace), AQ_TRACE_MAX_BYTES=str(2**62))
+
+    print(f"== {app} rows={rows} stations={stations}", flush=True)
+    start = time.perf_counter()
+    ensure_data(rows, stations, seed, filename)
+    print(f"data siap ({time.perf_counter() - start:.1f}s)", flush=True)
+
+    from streamlit.testing.v1 import AppTest
+
+    from cube import get_cube
+    from data_cache import fetch_cached
+    from ingest import open_live
+
+    if memory:
+        tracemalloc.start()
+    recorder = Recorder({
+        "run": run_id, "commit": git_commit(), "app": app, "rows": rows, "stations": stations,
+        "seed": seed, "memory_tracked": memory,
+    }, memory)
+
+    # Load (unduh dari mirror, konversi ke Parquet bila perlu) dan cube
+    path = recorder.measure("dataset", "fetch", lambda: fetch_cached(f"bench://{filename}", filename))
+    df = recorder.measure("dataset", "open", lambda: open_live(path))
+    recorder.measure("dataset", "load", lambda: df.load())
+    recorder.measure("dataset", "cube", lambda: get_cube(df))
+
+    # Tiap view dibuka sekali lewat sidebar. Run pertama juga memuat modul dan bagian
+    # atas halaman (view "page") untuk view default.
+    at = AppTest.from_file(str(Path(__file__).resolve().parent / app), default_timeout=3600)
+    seen = set()
+
+    def rerun():
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+
+    def open_view():
+        """
+        Rerun dan catat fase tiap view yang baru pertama kali tampil. Mengembalikan
+        False bila view rerun ini sudah pernah diukur (mis. stasiun lain di view yang sama).
+        """
+        offset = trace.stat().st_size if trace.exists() else 0
+        _, *stats = recorder.timed(rerun)
+        phases = view_phases(read_spans(trace, offset))
+        views = [name for name in phases if name != "page"] or ["page"]
+        if seen.issuperset(views):
+            return False
+        for name, totals in phases.items():
+            if name not in seen:
+                for phase, seconds in totals.items():
+                    recorder.record(name, phase, seconds)
+        recorder.record(views[0], "rerun", *stats)
+        seen.update(phases)
+        return True
+
+    open_view()
+    for menu in at.sidebar.radio[0].options:
+        if menu != at.sidebar.radio[0].value:
+            at.sidebar.radio[0].set_value(menu)
+            open_view()
+        for option in at.sidebar.selectbox[0].options[1:]:
+            at.sidebar.selectbox[0].set_value(option)
+            if not open_view():
+                break
+
+    # Rerun tanpa perubahan: biaya dasar tiap interaksi (semua sudah di cache)
+    recorder.measure("page", "rerun", rerun)
+
+    maxrss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    recorder.record("process", "maxrss", None, maxrss_mb)
+    save_results(recorder.records)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).resolve().parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(records, path=RESULTS):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def load_results(path=RESULTS):
+    with open(path, encoding="utf-8") as f:
+        return pd.DataFrame([json.loads(line) for line in f if line.strip()])
+
+
+def compare(path=RESULTS, threshold=REGRESSION_RATIO):
+    """
+    Bandingkan run terakhir dengan run sebelumnya pada konfigurasi yang sama
+    (app, rows, stations, memory_tracked) dan tandai fase yang melambat.
+    """
+    results = load_results(path)
+    config = ["app", "rows", "stations", "memory_tracked"]
+    for key, group in results.groupby(config, sort=False):
+        runs = list(dict.fromkeys(group["run"]))
+        if len(runs) < 2:
+            continue
+        before, after = (group[group["run"] == run].set_index(["view", "phase"]) for run in runs[-2:])
+        table = pd.DataFrame({
+            "before_s": before["seconds"], "after_s": after["seconds"],
+            "before_mb": before["peak_mb"], "after_mb": after["peak_mb"],
+        }).dropna(how="all")
+        table["ratio"] = table["after_s"] / table["before_s"]
+        table["flag"] = np.where((table["ratio"] > threshold) & (table["after_s"] - table["before_s"] > 0.05), "REGRESI", "")
+        commits = f"{before['commit'].iloc[0]} -> {after['commit'].iloc[0]}"
+        print(f"== {dict(zip(config, key))} {commits}")
+        print(table.round(3).to_string())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dashboard dengan data sintetis")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="jalankan benchmark (satu proses per skala)")
+    run.add_argument("--rows", type=int, nargs="+", default=SCALES[:1], help=f"jumlah baris, mis. {' '.join(map(str, SCALES))}")
+    run.add_argument("--stations", type=int, default=12)
+    run.add_argument("--app", choices=sorted(APPS), default="dashboard3.py")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--no-memory", action="store_true", help="tanpa tracemalloc (waktu lebih akurat)")
+    scale = sub.add_parser("scale", help=argparse.SUPPRESS)
+    scale.add_argument("rows", type=int)
+    scale.add_argument("stations", type=int)
+    scale.add_argument("app")
+    scale.add_argument("seed", type=int)
+    scale.add_argument("memory", type=int)
+    scale.add_argument("run_id")
+    cmp = sub.add_parser("compare", help="bandingkan dua run terakhir")
+    cmp.add_argument("--threshold", type=float, default=REGRESSION_RATIO)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        for rows in args.rows:
+            subprocess.run([sys.executable, __file__, "scale", str(rows), str(args.stations), args.app,
+                            str(args.seed), str(int(not args.no_memory)), run_id], check=True)
+    elif args.command == "scale":
+        run_scale(args.rows, args.stations, args.app, args.seed, bool(args.memory), args.run_id)
+    else:
+        compare(threshold=args.threshold)
@@ -0,0 +1,163 @@
+"""
+Matriks korelasi per stasiun dan bulan dari akumulator kovarians yang bisa digabung.
+
+Untuk tiap (station, year, month) dan tiap pasangan kolom numerik (x, y) disimpan
+jumlah baris yang punya kedua nilai ``n``, rata-rata ``mean_x``/``mean_y``, jumlah
+kuadrat simpangan ``m2_x``/``m2_y`` dan jumlah hasil kali simpangan ``c_xy`` (seperti
+algoritma Welford). Akumulator beberapa grup atau batch digabung dengan rumus Chan
+dkk. (``combine_moments``) tanpa membaca ulang data per jam, sehingga korelasi bisa
+di-rollup ke stasiun, bulan atau seluruh data, dan diperbarui saat ingest. Pasangan
+dihitung dari baris yang punya kedua nilai, sama seperti ``DataFrame.corr()``.
+"""
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from cube import BATCH_ROWS, ENGINE, IN_MEMORY_ROWS, MERGE_EVERY
+from data_cache import CACHE_DIR
+from dataset import NUMERIC_COLUMNS, concat_frames
+from memo import PersistedArtifact, memoize
+
+GROUP_KEYS = ["station", "year", "month"]
+KEYS = [*GROUP_KEYS, "x", "y"]
+PAIRS = list(combinations(NUMERIC_COLUMNS, 2))
+
+
+def build_moments(df):
+    """
+    Akumulator per (station, year, month, x, y) dari data per jam, satu ``np.bincount``
+    per besaran per pasangan kolom.
+    """
+    groups = df[GROUP_KEYS].groupby(GROUP_KEYS, observed=True, sort=True)
+    group = groups.ngroup().to_numpy()
+    index = groups.size().index
+    size = len(index)
+    values = {col: df[col].to_numpy(dtype="float64", na_value=np.nan) for col in NUMERIC_COLUMNS}
+
+    parts = []
+    for x_col, y_col in PAIRS:
+        valid = ~(np.isnan(values[x_col]) | np.isnan(values[y_col]))
+        g, x, y = group[valid], values[x_col][valid], values[y_col][valid]
+        n = np.bincount(g, minlength=size)
+        count = np.maximum(n, 1)
+        mean_x = np.bincount(g, x, minlength=size) / count
+        mean_y = np.bincount(g, y, minlength=size) / count
+        dx, dy = x - mean_x[g], y - mean_y[g]
+        part = pd.DataFrame({
+            "n": n, "mean_x": mean_x, "mean_y": mean_y,
+            "m2_x": np.bincount(g, dx * dx, minlength=size),
+            "m2_y": np.bincount(g, dy * dy, minlength=size),
+            "c_xy": np.bincount(g, dx * dy, minlength=size),
+        }, index=index)[n > 0].reset_index()
+        part.insert(3, "x", pd.Categorical([x_col] * len(part), categories=NUMERIC_COLUMNS))
+        part.insert(4, "y", pd.Categorical([y_col] * len(part), categories=NUMERIC_COLUMNS))
+        parts.append(part)
+    moments = concat_frames(parts).sort_values(KEYS, kind="stable", ignore_index=True)
+    moments.attrs = {"version": df.attrs.get("version"), "sorted_by": "station"}
+    return moments
+
+
+def combine_moments(moments, by):
+    """
+    Gabungkan akumulator ke grup ``by`` (mis. ``["station", "x", "y"]``):
+    n dijumlah, rata-rata dibobot n, dan m2/c ditambah koreksi ``n_k * dx * dy``
+    terhadap rata-rata gabungan (rumus Chan dkk. untuk banyak bagian sekaligus).
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    moments = moments[moments["n"] > 0]
+    keys = [moments[key] for key in by]
+    n = moments["n"].groupby(keys, observed=True).transform("sum")
+    mean_x = (moments["n"] * moments["mean_x"]).groupby(keys, observed=True).transform("sum") / n
+    mean_y = (moments["n"] * moments["mean_y"]).groupby(keys, observed=True).transform("sum") / n
+    dx, dy = moments["mean_x"] - mean_x, moments["mean_y"] - mean_y
+    parts = pd.DataFrame({
+        **{key: moments[key] for key in by},
+        "n": moments["n"],
+        "mean_x": mean_x,
+        "mean_y": mean_y,
+        "m2_x": moments["m2_x"] + moments["n"] * dx * dx,
+        "m2_y": moments["m2_y"] + moments["n"] * dy * dy,
+        "c_xy": moments["c_xy"] + moments["n"] * dx * dy,
+    })
+    result = parts.groupby(by, observed=True, sort=True).agg(
+        {"n": "sum", "mean_x": "first", "mean_y": "first", "m2_x": "sum", "m2_y": "sum", "c_xy": "sum"})
+    return result
+
+
+def merge_moments(parts):
+    """
+    Gabungkan akumulator beberapa batch (mis. akumulator lama dan batch data baru).
+    """
+    merged = combine_moments(concat_frames(parts), KEYS).reset_index()
+    merged.attrs = {"version": None, "sorted_by": "station"}
+    return merged
+
+
+def build_moments_chunked(files, batch_rows=BATCH_ROWS):
+    """
+    Akumulator dari file Parquet yang dibaca per batch lalu digabung.
+    """
+    columns = [*GROUP_KEYS, *NUMERIC_COLUMNS]
+    parts = []
+    for path in files:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            parts.append(build_moments(batch.to_pandas()))
+            if len(parts) >= MERGE_EVERY:
+                parts = [merge_moments(parts)]
+    return merge_moments(parts)
+
+
+def _build(df):
+    files = getattr(df, "files", None)
+    if files is None or ENGINE == "pandas" or (ENGINE == "auto" and len(df) <= IN_MEMORY_ROWS):
+        moments = build_moments(df)
+    else:
+        moments = build_moments_chunked(files)
+    moments.attrs["version"] = df.attrs.get("version")
+    return moments
+
+
+_moments = PersistedArtifact("correlation.get_moments", "moments", CACHE_DIR / "moments", _build)
+
+
+def moments_path(version):
+    return _moments.path(version)
+
+
+def save_moments(moments):
+    """
+    Simpan akumulator ke disk (atomik) dan ke memori untuk versi ``moments.attrs["version"]``.
+    """
+    return _moments.save(moments)
+
+
+def get_moments(df):
+    """
+    Akumulator untuk versi dataset ``df.attrs["version"]``: dari memori, dari disk,
+    atau dibangun sekali lalu disimpan.
+    """
+    return _moments.get(df)
+
+
+@memoize()
+def correlation_matrix(moments, station=None, year=None, month=None):
+    """
+    Matriks korelasi Pearson semua kolom numerik untuk seluruh data, atau dibatasi ke
+    ``station`` dan/atau bulan (``year``, ``month``). Sel tanpa data atau tanpa
+    variasi bernilai NaN.
+    """
+    for key, value in (("station", station), ("year", year), ("month", month)):
+        if value is not None:
+            moments = moments[moments[key] == value]
+    pairs = combine_moments(moments, ["x", "y"]) if len(moments) else pd.DataFrame(columns=["m2_x", "m2_y", "c_xy"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = pairs["c_xy"] / np.sqrt(pairs["m2_x"] * pairs["m2_y"])
+
+    matrix = np.full((len(NUMERIC_COLUMNS), len(NUMERIC_COLUMNS)), np.nan)
+    position = {col: i for i, col in enumerate(NUMERIC_COLUMNS)}
+    for (x_col, y_col), value in r.items():
+        matrix[position[x_col], position[y_col]] = matrix[position[y_col], position[x_col]] = value
+    np.fill_diagonal(matrix, 1.0)
+    return pd.DataFrame(matrix, index=NUMERIC_COLUMNS, columns=NUMERIC_COLUMNS)
@@ -0,0 +1,236 @@
+"""
+Cube agregat (OLAP) untuk semua visualisasi.
+
+Data per jam diringkas sekali per versi dataset menjadi sum, count, min dan max
+tiap kolom numerik dengan kunci (station, year, month, wd). Visualisasi cukup
+me-rollup cube ini ke dimensi yang dibutuhkan (per stasiun, per bulan, per bulan
+dan arah angin), tidak lagi memindai ~420 ribu baris data per jam setiap kali
+halaman dibuka. Ukuran cube bulanan hanya tergantung jumlah stasiun dan bulan,
+bukan jumlah baris. Cube yang lebih rinci per (day, hour_bucket) tersedia dengan
+argumen ``hour_bucket``.
+
+Semua stat di cube bisa digabung (sum/count/rows dijumlah, min/max diambil
+min/max), sehingga data baru cukup diringkas sendiri lalu digabung dengan cube
+lama (``merge_cubes``) tanpa memindai ulang riwayat.
+
+Dataset Parquet (``LazyDataset``) dengan lebih dari ``IN_MEMORY_ROWS`` baris dibangun
+cube-nya out-of-core: dengan DuckDB bila terpasang (agregasi SQL langsung di file
+Parquet, memori dibatasi ``AQ_DUCKDB_MEMORY``), selain itu per batch Parquet yang
+masing-masing diringkas lalu digabung. Puncak memori sebanding dengan ukuran cube dan
+satu batch, bukan jumlah baris data per jam. Engine bisa dipaksa lewat ``AQ_ENGINE``
+(``auto``, ``duckdb``, ``chunked``, ``pandas``).
+"""
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from data_cache import CACHE_DIR
+from dataset import CALENDAR_COLUMNS, NUMERIC_COLUMNS, WIND_DIRECTIONS, concat_frames, select_station
+from memo import PersistedArtifact, memoize
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+HOUR_BUCKET = 6  # jam per bucket untuk cube rinci: 0-5, 6-11, 12-17, 18-23
+MONTH_KEYS = ["station", "year", "month", "wd"]
+KEYS = ["station", "year", "month", "day", "hour_bucket", "wd"]  # cube rinci (hour_bucket bukan None)
+STATS = ["sum", "count", "min", "max"]
+
+ENGINE = os.environ.get("AQ_ENGINE", "auto")
+IN_MEMORY_ROWS = 5_000_000  # engine auto: sampai sekian baris cube dibangun di memori (lebih cepat)
+BATCH_ROWS = 1_000_000  # baris per batch untuk engine chunked
+MERGE_EVERY = 16  # engine chunked: cube parsial digabung tiap sekian batch
+DUCKDB_MEMORY = os.environ.get("AQ_DUCKDB_MEMORY", "1GB")
+
+
+def build_cube(df, hour_bucket=None):
+    """
+    Hitung cube dari data per jam. Kolom hasil: ``<kolom>_<stat>`` untuk tiap stat
+    di STATS, plus ``rows`` (jumlah baris data per jam di tiap sel).
+    """
+    keys = [df["station"], df["year"], df["month"], df["wd"]]
+    if hour_bucket is not None:
+        keys[3:3] = [df["day"], (df["hour"] // hour_bucket).astype("int8").rename("hour_bucket")]
+    grouped = df[NUMERIC_COLUMNS].groupby(keys, observed=True, dropna=False, sort=True)
+
+    parts = []
+    for stat in STATS:
+        part = getattr(grouped, stat)()
+        if stat == "sum":
+            part = part.astype("float64")
+        elif stat == "count":
+            part = part.astype("int32")
+        parts.append(part.add_suffix(f"_{stat}"))
+    parts.append(grouped.size().astype("int32").rename("rows"))
+
+    cube = pd.concat(parts, axis=1).reset_index()
+    cube.attrs = {"version": df.attrs.get("version"), "sorted_by": "station"}
+    return cube
+
+
+def merge_cubes(cubes):
+    """
+    Gabungkan beberapa cube (mis. cube lama dan cube batch data baru). Hanya sel yang
+    muncul di lebih dari satu cube yang diagregasi ulang.
+    """
+    combined = concat_frames(cubes)
+    keys = [key for key in KEYS if key in combined.columns]
+    overlap = combined.duplicated(keys, keep=False).to_numpy()
+    if overlap.any():
+        merge = {"sum": "sum", "count": "sum", "min": "min", "max": "max"}
+        agg = {col: merge[col.rsplit("_", 1)[1]] for col in combined.columns if col not in keys and col != "rows"}
+        agg["rows"] = "sum"
+        merged = combined[overlap].groupby(keys, observed=True, dropna=False).agg(agg).reset_index()
+        combined = concat_frames([combined[~overlap], merged.astype(combined.dtypes.to_dict())])
+    combined = combined.sort_values(keys, kind="stable", ignore_index=True)
+    combined.attrs = {"version": None, "sorted_by": "station"}
+    return combined
+
+
+def _cube_dtypes(cube):
+    """
+    Samakan tipe kolom cube hasil engine lain dengan ``build_cube`` dan urutkan per kunci.
+    """
+    dtypes = {"station": "category", "year": "int16", "month": "int8", "day": "int8", "hour_bucket": "int8",
+              "wd": pd.CategoricalDtype(WIND_DIRECTIONS), "rows": "int32"}
+    for col in NUMERIC_COLUMNS:
+        dtypes.update({f"{col}_sum": "float64", f"{col}_count": "int32", f"{col}_min": "float32", f"{col}_max": "float32"})
+    keys = [key for key in KEYS if key in cube.columns]
+    cube = cube.astype({col: dtype for col, dtype in dtypes.items() if col in cube.columns})
+    cube = cube.sort_values(keys, kind="stable", ignore_index=True)
+    cube.attrs = {"version": None, "sorted_by": "station"}
+    return cube
+
+
+def build_cube_chunked(files, hour_bucket=None, batch_rows=BATCH_ROWS):
+    """
+    Cube dari file Parquet yang dibaca per batch (hanya kolom yang dibutuhkan); cube
+    parsial tiap batch digabung dengan ``merge_cubes``.
+    """
+    columns = ["station", *CALENDAR_COLUMNS, "wd", *NUMERIC_COLUMNS]
+    parts = []
+    for path in files:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            parts.append(build_cube(batch.to_pandas(), hour_bucket))
+            if len(parts) >= MERGE_EVERY:
+                parts = [merge_cubes(parts)]
+    return _cube_dtypes(merge_cubes(parts))
+
+
+def build_cube_duckdb(files, hour_bucket=None):
+    """
+    Cube dari file Parquet dengan satu query GROUP BY di DuckDB. DuckDB memindai
+    file secara streaming dan menumpahkan hash table ke disk bila melebihi
+    ``DUCKDB_MEMORY``.
+    """
+    keys = list(MONTH_KEYS)
+    if hour_bucket is not None:
+        keys[3:3] = ["day", f"hour // {int(hour_bucket)} AS hour_bucket"]
+    # SUM tanpa nilai = NULL di SQL, 0 di pandas
+    aggregates = {"sum": 'COALESCE(SUM("{}"), 0)', "count": 'COUNT("{}")', "min": 'MIN("{}")', "max": 'MAX("{}")'}
+    select = [f'{aggregates[stat].format(col)} AS "{col}_{stat}"' for stat in STATS for col in NUMERIC_COLUMNS]
+    query = f"""
+        SELECT {", ".join(keys)}, {", ".join(select)}, COUNT(*) AS rows
+        FROM read_parquet(?)
+        GROUP BY ALL
+    """
+    spill_dir = CACHE_DIR / "duckdb"
+    spill_dir.mkdir(parents=True, exist_ok=True)
+    with duckdb.connect() as con:
+        con.execute(f"SET memory_limit = '{DUCKDB_MEMORY}'")
+        con.execute(f"SET temp_directory = '{spill_dir.as_posix()}'")
+        con.execute("SET enable_progress_bar = false")
+        cube = con.execute(query, [[str(path) for path in files]]).df()
+    return _cube_dtypes(cube)
+
+
+def _build(df, hour_bucket):
+    """
+    Bangun cube dengan engine ``ENGINE``. Frame di memori (tanpa daftar file Parquet)
+    selalu memakai ``build_cube``; tanpa DuckDB engine ``duckdb`` jatuh ke ``chunked``.
+    """
+    files = getattr(df, "files", None)
+    if files is None or ENGINE == "pandas" or (ENGINE == "auto" and len(df) <= IN_MEMORY_ROWS):
+        cube = build_cube(df, hour_bucket)
+    elif ENGINE in ("auto", "duckdb") and duckdb is not None:
+        cube = build_cube_duckdb(files, hour_bucket)
+    else:
+        cube = build_cube_chunked(files, hour_bucket)
+    cube.attrs["version"] = df.attrs.get("version")
+    return cube
+
+
+def _filename(version, hour_bucket=None):
+    grain = "month" if hour_bucket is None else f"h{hour_bucket}"
+    return f"{version}-{grain}.parquet"
+
+
+# Versi lama (sebelum ingest) cepat tergeser dari memori
+_cubes = PersistedArtifact("cube.get_cube", "cube", CACHE_DIR / "cubes", _build, _filename)
+
+
+def cube_path(version, hour_bucket=None):
+    return _cubes.path(version, hour_bucket)
+
+
+def save_cube(cube, hour_bucket=None):
+    """
+    Simpan cube ke disk (atomik, aman dibaca proses lain) dan ke memori untuk
+    versi ``cube.attrs["version"]``.
+    """
+    return _cubes.save(cube, hour_bucket)
+
+
+def get_cube(df, hour_bucket=None):
+    """
+    Ambil cube untuk versi dataset ``df.attrs["version"]``: dari memori, dari disk,
+    atau dibangun sekali lalu disimpan. Default cube bulanan; ``hour_bucket`` (mis.
+    HOUR_BUCKET) untuk cube per hari dan bucket jam.
+    """
+    return _cubes.get(df, hour_bucket)
+
+
+@memoize()
+def rollup(cube, by, columns=NUMERIC_COLUMNS, station=None):
+    """
+    Rollup cube ke dimensi ``by`` (opsional hanya untuk satu ``station``).
+    Menghasilkan ``<kolom>_sum/_count/_min/_max/_mean`` dan ``rows``, dengan index = ``by``.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    if station is not None:
+        cube = select_station(cube, station)
+    grouped = cube.groupby(by, observed=True, sort=True)
+
+    sums = grouped[[f"{col}_sum" for col in columns]].sum()
+    counts = grouped[[f"{col}_count" for col in columns]].sum()
+    result = pd.concat([
+        sums,
+        counts,
+        grouped[[f"{col}_min" for col in columns]].min(),
+        grouped[[f"{col}_max" for col in columns]].max(),
+        grouped["rows"].sum(),
+    ], axis=1)
+
+    for col in columns:
+        count = result[f"{col}_count"]
+        result[f"{col}_mean"] = result[f"{col}_sum"] / count.where(count > 0)
+    return result
+
+
+def month_index(index):
+    """
+    PeriodIndex bulanan dari level ``year`` dan ``month`` index hasil rollup.
+    """
+    return pd.PeriodIndex.from_fields(year=index.get_level_values("year").to_numpy(),
+                                      month=index.get_level_values("month").to_numpy(), freq="M").rename("year_month")
+
+
+def means(cube, by, columns=NUMERIC_COLUMNS, station=None):
+    """
+    Rata-rata tiap kolom per ``by``, dengan nama kolom asli (mis. "PM2.5").
+    """
+    result = rollup(cube, by, columns, station)
+    return result[[f"{col}_mean" for col in columns]].rename(columns=lambda c: c[:-len("_mean")])
@@ -1,21 +1,47 @@
 import streamlit as st
-import gdown
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
 import seaborn as sns
-from adjustText import adjust_text
-import folium
-from streamlit_folium import folium_static
+import streamlit.components.v1 as components
 from PIL import Image
+from data_cache import fetch_cached
+from dataset import select_time, time_range
+from ingest import open_live
+from cube import get_cube, means, month_index, rollup
+from figures import DPI, render_cached
+from label_layout import place_labels
+from density import PAIRS, pair_histogram, plot_density
+from correlation import correlation_matrix, get_moments
+from downsample import station_series
+from wind_rose import plot_wind_rose, rose_table
+from station_map import map_html, missing_locations, station_locations
+from aqi import CATEGORIES, CATEGORY_COLORS, CATEGORY_RANGES, aqi_summary
+from aggregates import count_per_station, describe, station_statistics
+from profiling import debug_panel, finish_rerun, start_rerun, view
+
+# Ukur waktu rerun ini bila mode debug aktif (AQ_DEBUG=1, atau AQ_DEBUG=query dan ?debug=1)
+start_rerun()
 
 url = "https://drive.google.com/uc?id=14RFUpJQN-H_9RY6O53_dCX0AoMeJHidy"
-output = "air_quality_all.csv"
 
-gdown.download(url, output, quiet=False)
+# Unduh hanya bila belum ada di cache atau data di server berubah
+output = fetch_cached(url, "air_quality_all.csv")
 
-# Load Data
-df = pd.read_csv("air_quality_all.csv")
+# Load Data secara lazy: kolom baru dibaca saat dibutuhkan view yang dipilih,
+# termasuk data per jam baru yang sudah di-ingest (lihat ingest.py)
+df = open_live(output)
+
+# Filter rentang waktu global: semua view memakai potongan data di rentang ini
+# (dicari per stasiun dengan searchsorted, lihat dataset.select_time)
+first, last = time_range(df)
+picked = st.sidebar.date_input("Rentang waktu", (first.date(), last.date()), min_value=first.date(), max_value=last.date())
+if len(picked) == 2:
+    df = select_time(df, pd.Timestamp(picked[0]), pd.Timestamp(picked[1]) + pd.Timedelta(days=1))
+if len(df) == 0:
+    st.warning("Tidak ada data pada rentang waktu ini.")
+    st.stop()
 
 # Halaman Utama
 st.title("Dashboard Kualitas Udara di China")
@@ -26,8 +52,7 @@ file_id = "1DOBoHaEYgnB7wHlW5C4YESLf3WiqOVZC"
 url = f"https://drive.google.com/uc?id={file_id}"
 
 # Unduh file
-output = "air_quality_bg.jpg"
-gdown.download(url, output, quiet=False)
+output = fetch_cached(url, "air_quality_bg.jpg")
 
 # Tampilkan gambar
 image = Image.open(output)
@@ -37,251 +62,208 @@ st.subheader("Preview Data")
 st.dataframe(df.head())
 
 st.subheader("Statistik Deskriptif")
-st.write(df.describe())
+st.write(describe(df))
 
+@view
 def visualize_station_distribution(df):
-    station_counts = df["station"].value_counts()
-    labels = [f"{s}\n({c/sum(station_counts)*100:.1f}%, {c})" for s, c in zip(station_counts.index, station_counts)]
-    colors = sns.color_palette("Oranges", len(station_counts))
-    fig, ax = plt.subplots(figsize=(8, 8))
-    ax.pie(station_counts, labels=labels, colors=colors, startangle=140)
-    ax.set_title("Distribusi Data per Stasiun", fontsize=14)
-    st.pyplot(fig)
+    def draw():
+        station_counts = count_per_station(df)
+        labels = [f"{s}\n({c/sum(station_counts)*100:.1f}%, {c})" for s, c in zip(station_counts.index, station_counts)]
+        colors = sns.color_palette("Oranges", len(station_counts))
+        fig, ax = plt.subplots(figsize=(8, 8))
+        ax.pie(station_counts, labels=labels, colors=colors, startangle=140)
+        ax.set_title("Distribusi Data per Stasiun", fontsize=14)
+        return fig
+
+    st.image(render_cached("station_distribution", df.attrs.get("version"), draw), use_container_width=True)
     st.write("Distribusi data dari tiap stasiun cukup merata.")
 
+@view
 def visualize_histograms(df):
     """
     Menampilkan histogram rata-rata per tahun untuk berbagai parameter kualitas udara di Streamlit.
     """
-    # Daftar kolom yang ingin dibuat histogramnya
-    columns = ["PM2.5", "PM10", "SO2", "NO2", "CO", "O3", "TEMP", "PRES", "DEWP", "RAIN", "WSPM"]
+    def draw():
+        # Daftar kolom yang ingin dibuat histogramnya
+        columns = ["PM2.5", "PM10", "SO2", "NO2", "CO", "O3", "TEMP", "PRES", "DEWP", "RAIN", "WSPM"]
+
+        # Buat figure dengan ukuran besar
+        fig, axes = plt.subplots(nrows=4, ncols=3, figsize=(15, 12))  # 4 baris, 3 kolom (1 slot kosong)
+        axes = axes.flatten()  # Ubah ke array 1D untuk iterasi lebih mudah
 
-    # Buat figure dengan ukuran besar
-    fig, axes = plt.subplots(nrows=4, ncols=3, figsize=(15, 12))  # 4 baris, 3 kolom (1 slot kosong)
-    axes = axes.flatten()  # Ubah ke array 1D untuk iterasi lebih mudah
+        # Hitung rata-rata per tahun untuk semua kolom sekaligus dari cube
+        yearly_means = means(get_cube(df), "year", columns)
 
-    # Loop untuk setiap kolom dan buat histogram berdasarkan tahun
-    for i, col in enumerate(columns):
-        ax = axes[i]
+        # Loop untuk setiap kolom dan buat histogram berdasarkan tahun
+        for i, col in enumerate(columns):
+            ax = axes[i]
 
-        # Hitung rata-rata per tahun
-        mean_values = df.groupby("year")[col].mean()
+            mean_values = yearly_means[col]
 
-        # Cari nilai maksimum
-        max_value = mean_values.max()
+            # Cari nilai maksimum
+            max_value = mean_values.max()
 
-        # Atur warna (nilai tertinggi "orange", lainnya "yellow")
-        colors = ["orange" if v == max_value else "yellow" for v in mean_values]
+            # Atur warna (nilai tertinggi "orange", lainnya "yellow")
+            colors = ["orange" if v == max_value else "yellow" for v in mean_values]
 
-        # Plot histogram dengan warna sesuai
-        mean_values.plot(kind="bar", ax=ax, color=colors, edgecolor="black")
+            # Plot histogram dengan warna sesuai
+            mean_values.plot(kind="bar", ax=ax, color=colors, edgecolor="black")
 
-        ax.set_title(f"Average {col} per Year")
-        ax.set_xlabel("Year")
-        ax.set_ylabel(col)
-        ax.grid(axis="y", linestyle="--", alpha=0.7)
+            ax.set_title(f"Average {col} per Year")
+            ax.set_xlabel("Year")
+            ax.set_ylabel(col)
+            ax.grid(axis="y", linestyle="--", alpha=0.7)
 
-        # Pastikan label tahun horizontal
-        ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
+            # Pastikan label tahun horizontal
+            ax.set_xticklabels(ax.get_xticklabels(), rotation=0)
 
-    # Hapus subplot kosong jika ada (jika jumlah kolom kurang dari 12)
-    if len(columns) < len(axes):
-        fig.delaxes(axes[-1])
+        # Hapus subplot kosong jika ada (jika jumlah kolom kurang dari 12)
+        if len(columns) < len(axes):
+            fig.delaxes(axes[-1])
 
-    plt.tight_layout()
+        plt.tight_layout()
+        return fig
 
     # Tampilkan di Streamlit
     st.subheader("Average Air Quality Indicators per Year")
-    st.pyplot(fig)
+    st.image(render_cached("histograms", df.attrs.get("version"), draw), use_container_width=True)
     st.write("Data untuk tahun 2017 menunjukkan visual yang berbeda dari tahun tahun sebelumnya akibat keterbatasan data dari tahun 2017(hanya bulan awal).")
 
+@view
 def visualize_scatter_plots(df):
     """
     Menampilkan 4 scatter plot untuk pasangan kolom yang dipilih.
     """
     st.subheader("Scatter Plots")
-
-    # Ambil sampel acak (20% dari total data)
-    df_sampled = df.sample(frac=0.2, random_state=42)
-
-    # Daftar pasangan kolom yang akan diplot
-    pairs = [
-        ("TEMP", "PRES"),
-        ("TEMP", "DEWP"),
-        ("PRES", "DEWP"),
-        ("PM2.5", "PM10")
-    ]
-
-    # Buat figure dan axes
-    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
-    axes = axes.flatten()
-
-    # Loop untuk setiap pasangan dan buat scatter plot
-    for i, (x_col, y_col) in enumerate(pairs):
-        axes[i].scatter(df_sampled[x_col], df_sampled[y_col], alpha=0.5, s=10, color="orange")
-        axes[i].set_xlabel(x_col)
-        axes[i].set_ylabel(y_col)
-        axes[i].set_title(f"{x_col} vs {y_col}")
-        axes[i].grid(True, linestyle="--", alpha=0.5)
-
-    # Tata letak agar tidak bertabrakan
-    plt.tight_layout()
+    mode = st.radio("Mode tampilan", ["Density (semua data)", "Sampel acak 20%"], horizontal=True)
+    density_mode = mode.startswith("Density")
+
+    def draw():
+        # Daftar pasangan kolom yang akan diplot
+        pairs = [
+            ("TEMP", "PRES"),
+            ("TEMP", "DEWP"),
+            ("PRES", "DEWP"),
+            ("PM2.5", "PM10")
+        ]
+
+        if not density_mode:
+            # Ambil sampel acak (20% dari total data)
+            df_sampled = df[["TEMP", "PRES", "DEWP", "PM2.5", "PM10"]].sample(frac=0.2, random_state=42)
+
+        # Buat figure dan axes
+        fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+        axes = axes.flatten()
+
+        # Loop untuk setiap pasangan dan buat scatter plot
+        for i, (x_col, y_col) in enumerate(pairs):
+            if density_mode:
+                # Histogram 2D dari seluruh data, biaya render tidak tergantung jumlah baris
+                mesh = plot_density(axes[i], *pair_histogram(df, x_col, y_col))
+                fig.colorbar(mesh, ax=axes[i], label="Jumlah data")
+            else:
+                axes[i].scatter(df_sampled[x_col], df_sampled[y_col], alpha=0.5, s=10, color="orange")
+            axes[i].set_xlabel(x_col)
+            axes[i].set_ylabel(y_col)
+            axes[i].set_title(f"{x_col} vs {y_col}")
+            axes[i].grid(True, linestyle="--", alpha=0.5)
+
+        # Tata letak agar tidak bertabrakan
+        plt.tight_layout()
+        return fig
 
     # Tampilkan plot di Streamlit
-    st.pyplot(fig)
-    st.write("Diambil sample secara acak sebesar 20% dari data agar visual scatter plot terbaca lebih jelas."
-    "Pada scatter plot terlihat bahwa korelasi positif dimiliki pasangan TEMP vs DEWP dan PM2.5 vs PM10."
+    key = ("density",) if density_mode else ("sample",)
+    st.image(render_cached("scatter_plots", df.attrs.get("version"), draw, key=key), use_container_width=True)
+    if density_mode:
+        st.write("Setiap panel memakai seluruh data, warna menunjukkan jumlah data di tiap sel (skala log).")
+    else:
+        st.write("Diambil sample secara acak sebesar 20% dari data agar visual scatter plot terbaca lebih jelas.")
+    st.write("Pada scatter plot terlihat bahwa korelasi positif dimiliki pasangan TEMP vs DEWP dan PM2.5 vs PM10."
     "Sedangkan korelasi negatif dimiliki pasangan TEMP vs PRES dan PRES vs DEWP."
     "Dapat diambil kesimpulan bahwa kolom yang berpasangan memiliki ketergantungan/hubungan yang kuat karena scatter plot yang ditampilkan memiliki tingkat kemiringan sekitar 45 derajat.")
 
+    # Koefisien korelasi dari seluruh data (bukan dari sampel yang digambar)
+    corr = correlation_matrix(get_moments(df))
+    st.write("Koefisien korelasi Pearson seluruh data: "
+             + ", ".join(f"{x_col} vs {y_col} r = {corr.loc[x_col, y_col]:.2f}" for x_col, y_col in PAIRS) + ".")
 
+
+@view
 def show_station_statistics(df):
     st.subheader("Satistik Stasiun")
-    df_grouped = df.groupby("station").agg({"PM2.5": ["mean", "median", "max", "min"], "PM10": ["mean", "median", "max", "min"], "NO2": ["mean", "median", "max", "min"]}).reset_index()
-    df_grouped.columns = ['_'.join(col).strip() if col[1] else col[0] for col in df_grouped.columns]
+    # Rata-rata AQI per jam, kategorinya dan polutan utama tiap stasiun (lihat aqi.py)
+    station_aqi = aqi_summary(df)[["AQI", "category", "primary"]].rename(
+        columns={"AQI": "AQI_mean", "category": "AQI_category", "primary": "primary_pollutant"})
+    df_grouped = station_statistics(df).join(station_aqi, on="station")
     st.dataframe(df_grouped)
+    st.caption("Median, p90 dan p99 dihitung dari sketch kuantil (perkiraan, galat relatif maks. 1%).")
 
+@view
 def show_monthly_averages(df):
     """
     Menampilkan tabel rata-rata bulanan untuk parameter kualitas udara di Streamlit.
     """
     st.subheader("Data Kualitas Udara Berdasar Waktu")
 
-    # Buat kolom 'year_month' dalam format YYYY-MM
-    df["year_month"] = df["year"].astype(str) + "-" + df["month"].astype(str).str.zfill(2)
-
-    # Hitung rata-rata bulanan untuk parameter yang dipilih
-    df_monthly = df.groupby("year_month").agg({
-        "PM2.5": "mean",
-        "PM10": "mean",
-        "SO2": "mean",
-        "CO": "mean",
-        "O3": "mean",
-        "NO2": "mean",
-        "TEMP": "mean",
-        "PRES": "mean",
-        "DEWP": "mean",
-        "RAIN": "mean",
-        "WSPM": "mean"
-    }).reset_index()
+    # Hitung rata-rata bulanan untuk parameter yang dipilih (rollup dari cube)
+    df_monthly = means(get_cube(df), ["year", "month"],
+                       ["PM2.5", "PM10", "SO2", "CO", "O3", "NO2", "TEMP", "PRES", "DEWP", "RAIN", "WSPM"])
+
+    # Index periode bulanan, ditampilkan sebagai kolom 'year_month' (YYYY-MM)
+    df_monthly = df_monthly.set_axis(month_index(df_monthly.index).strftime("%Y-%m").rename("year_month")).reset_index()
 
     # Tampilkan tabel di Streamlit
     st.dataframe(df_monthly) 
 
+@view
 def visualize_map(df):
-    pm25_mean = df.groupby("station")["PM2.5"].mean().to_dict()
-    temp_mean = df.groupby("station")["TEMP"].mean().to_dict()
-
-    locations = {
-        "Aotizhongxin": (40.018, 116.397),
-        "Changping": (40.220, 116.231),
-        "Dingling": (40.292, 116.220),
-        "Dongsi": (39.929, 116.417),
-        "Guanyuan": (39.929, 116.339),
-        "Gucheng": (39.912, 116.184),
-        "Huairou": (40.322, 116.628),
-        "Nongzhanguan": (39.933, 116.461),
-        "Shunyi": (40.127, 116.654),
-        "Tiantan": (39.882, 116.411),
-        "Wanliu": (39.987, 116.303),
-        "Wanshouxigong": (39.878, 116.339),
-    }
-
-    def get_color(pm25):
-        if pm25 < 50:
-            return "blue"
-        elif pm25 < 55:
-            return "yellow"
-        elif pm25 < 60:
-            return "orange"
-        else:
-            return "red"
-
-    def get_size(pm25):
-        if pm25 < 50:
-            return 5
-        elif pm25 < 55:
-            return 10
-        elif pm25 < 60:
-            return 15
-        else:
-            return 20
-
-    # Buat peta interaktif
-    m = folium.Map(location=[39.9042, 116.4074], zoom_start=10)
-
-    for station, (lat, lon) in locations.items():
-        pm25 = pm25_mean.get(station, "No Data")
-        temp = temp_mean.get(station, "No Data")
-
-        if isinstance(pm25, (int, float)):
-            color = get_color(pm25)
-            size = get_size(pm25)
-        else:
-            color = "gray"
-            size = 5 
-
-        folium.CircleMarker(
-            location=[lat, lon],
-            radius=size,
-            color=color,
-            fill=True,
-            fill_color=color,
-            fill_opacity=0.7,
-            popup=f"<b>{station}</b><br>Mean PM2.5: {pm25:.2f}<br>Mean TEMP: {temp:.2f}°C",
-            tooltip=f"{station} (PM2.5: {pm25:.2f}, TEMP: {temp:.2f}°C)"
-        ).add_to(m)
-
-    folium_static(m)  # Menampilkan peta di Streamlit
+    # HTML peta (satu layer marker) di-cache per versi dataset dan file koordinat
+    locations = station_locations()
+    missing = missing_locations(df, locations)
+    if missing:
+        st.warning(f"Stasiun tanpa koordinat (tidak tampil di peta): {', '.join(missing)}")
+    components.html(map_html(df, locations), height=500)
 
     st.markdown("""
     - **PM2.5**: Partikulat halus berukuran ≤2.5 µm yang berbahaya karena dapat menembus paru-paru dan aliran darah sehingga menjadi indikator utama polusi udara.  
     - **TEMP**: Suhu udara dapat memengaruhi penyebaran dan konsentrasi polutan di atmosfer.
     """)
 
-    st.write("Dalam map interaktif, stasiun diklastering menjadi 4 warna. Berikut kategori berdasarkan rata-rata PM2.5:")
+    st.write("Warna marker menunjukkan kategori rata-rata AQI per jam tiap stasiun (standar China HJ 633-2012). "
+             "AQI tiap jam adalah sub-indeks terbesar dari PM2.5, PM10, SO2, NO2, CO dan O3:")
 
-    st.markdown("""
-    - **Sangat tercemar (merah)** PM2.5 >= 60: Tiantan, Wanshouxigong, Dongsi, Gucheng, Guanyuan  
-    - **Tercemar (oranye)** 55 <= PM2.5 < 60: Wanliu, Aotizhongxin, Nongzhanguan, Shunyi  
-    - **Sedang (kuning)** 50 <= PM2.5 < 55: Changping, Huairou  
-    - **Tidak tercemar (biru)** PM2.5 < 50: Dingling  
-    """)
+    st.markdown("\n".join(f"- **{label} ({color})** AQI {limits}"
+                           for label, color, limits in zip(CATEGORIES, CATEGORY_COLORS, CATEGORY_RANGES)))
 
     st.write("Dapat diamati bahwa stasiun yang berada di pusat kota memiliki tingkat pencemaran dan polusi yang lebih tinggi dibandingkan stasiun yang jauh dari pusat kota.")
 
+@view
 def visualize_scatter(df):
-    df_grouped = df.groupby("station").agg({
-        "PM2.5": ["mean", "median", "max", "min"],
-        "PM10": ["mean", "median", "max", "min"],
-        "NO2": ["mean", "median", "max", "min"]
-    }).reset_index()
-
-    df_grouped.columns = ['_'.join(col).strip() if col[1] else col[0] for col in df_grouped.columns]
-
-    x = df_grouped["PM2.5_mean"]
-    y = df_grouped["PM10_mean"]
-    size = 600
-    colors = df_grouped["NO2_mean"]
+    def draw():
+        df_grouped = rollup(get_cube(df), "station", ["PM2.5", "PM10", "NO2"]).reset_index()
 
-    plt.figure(figsize=(10, 6))
-    scatter = plt.scatter(x, y, s=size, c=colors, cmap="spring", alpha=0.3, edgecolors="black", linewidths=0.3)
+        x = df_grouped["PM2.5_mean"]
+        y = df_grouped["PM10_mean"]
+        size = 600
+        colors = df_grouped["NO2_mean"]
 
-    cbar = plt.colorbar(scatter)
-    cbar.set_label("Average NO2 Level")
+        fig = plt.figure(figsize=(10, 6))
+        scatter = plt.scatter(x, y, s=size, c=colors, cmap="spring", alpha=0.3, edgecolors="black", linewidths=0.3)
 
-    texts = []
-    for i, station in enumerate(df_grouped["station"]):
-        texts.append(plt.text(x[i], y[i], station, fontsize=9, ha="center", color="black"))
+        cbar = plt.colorbar(scatter)
+        cbar.set_label("Average NO2 Level")
 
-    adjust_text(texts, arrowprops=dict(arrowstyle="-", color="gray", lw=0.5))
+        # Posisi label dihitung sekali per versi dataset lalu dipakai ulang
+        place_labels(plt.gca(), x, y, df_grouped["station"], key=("station_scatter", df.attrs.get("version")), marker_size=size)
 
-    plt.xlabel('Average PM2.5')
-    plt.ylabel('Average PM10')
-    plt.title('Air Quality per Station (Colored by NO2 Level)')
-    plt.grid(True, linestyle="--", alpha=0.5)
+        plt.xlabel('Average PM2.5')
+        plt.ylabel('Average PM10')
+        plt.title('Air Quality per Station (Colored by NO2 Level)')
+        plt.grid(True, linestyle="--", alpha=0.5)
+        return fig
 
-    st.pyplot(plt)  # Menampilkan plot di Streamlit
+    st.image(render_cached("station_scatter", df.attrs.get("version"), draw), use_container_width=True)
 
     st.markdown("""
     - **PM10**: Partikulat kasar berukuran ≤10 µm yang dapat menyebabkan masalah pernapasan serta sering digunakan untuk mengukur tingkat debu dan polutan di udara.  
@@ -298,48 +280,49 @@ def visualize_scatter(df):
 
 
 
+@view
 def visualize_wind_speed(df):
     """
     Menampilkan grafik rata-rata kecepatan angin (WSPM) per bulan
     untuk arah angin tertentu (WNW, NW, NNW) di Streamlit.
     """
-    # Filter hanya 3 arah mata angin yang diinginkan
-    selected_wd = ["WNW", "NNW", "NW"]
-    df_filtered = df[df["wd"].isin(selected_wd)].copy()
-
-    # Format kolom "year_month" untuk agregasi
-    df_filtered["year_month"] = df_filtered["year"].astype(str) + "-" + df_filtered["month"].astype(str).str.zfill(2)
-
-    # Hitung rata-rata WSPM per tahun-bulan untuk setiap arah angin
-    df_wd = df_filtered.groupby(["year_month", "wd"])["WSPM"].mean().reset_index()
-
-    # Buat plot
-    fig, ax = plt.subplots(figsize=(12, 6))
-
-    # Warna dan transparansi untuk setiap arah angin
-    colors = {"WNW": "blue", "NW": "orange", "NNW": "green"}
-    alphas = {"WNW": 1, "NW": 0.3, "NNW": 0.3}
-
-    # Plot garis untuk masing-masing arah angin
-    for wd in selected_wd:
-        subset = df_wd[df_wd["wd"] == wd]
-        ax.plot(subset["year_month"], subset["WSPM"], linestyle="-", linewidth=2,
-                label=wd, color=colors[wd], alpha=alphas[wd])
+    def draw():
+        # Filter hanya 3 arah mata angin yang diinginkan
+        selected_wd = ["WNW", "NNW", "NW"]
+
+        # Hitung rata-rata WSPM per bulan untuk setiap arah angin (rollup dari cube),
+        # satu kolom per arah angin dengan index waktu awal bulan
+        df_wd = means(get_cube(df), ["year", "month", "wd"], ["WSPM"])["WSPM"].unstack("wd").reindex(columns=selected_wd)
+        df_wd = df_wd.set_axis(month_index(df_wd.index).to_timestamp())
+
+        # Buat plot
+        fig, ax = plt.subplots(figsize=(12, 6))
+
+        # Warna dan transparansi untuk setiap arah angin
+        colors = {"WNW": "blue", "NW": "orange", "NNW": "green"}
+        alphas = {"WNW": 1, "NW": 0.3, "NNW": 0.3}
+
+        # Plot garis untuk masing-masing arah angin
+        for wd in selected_wd:
+            ax.plot(df_wd.index, df_wd[wd], linestyle="-", linewidth=2,
+                    label=wd, color=colors[wd], alpha=alphas[wd])
         
-    # Kustomisasi plot
-    ax.set_xlabel("Year-Month")
-    ax.set_ylabel("Average Wind Speed (WSPM)")
-    ax.set_title("Average Wind Speed per Year-Month for Selected Wind Directions")
-    ax.legend(title="Wind Direction")
-    ax.grid(True, linestyle="--", alpha=0.5)
-
-    # Menampilkan label di sumbu x hanya untuk setiap 6 bulan sekali
-    ax.set_xticks(df_wd["year_month"][::6])
-    ax.set_xticklabels(df_wd["year_month"][::6], rotation=45, fontsize=10)
+        # Kustomisasi plot
+        ax.set_xlabel("Year-Month")
+        ax.set_ylabel("Average Wind Speed (WSPM)")
+        ax.set_title("Average Wind Speed per Year-Month for Selected Wind Directions")
+        ax.legend(title="Wind Direction")
+        ax.grid(True, linestyle="--", alpha=0.5)
+
+        # Menampilkan label di sumbu x hanya untuk setiap 6 bulan sekali
+        ax.xaxis.set_major_locator(mdates.MonthLocator(interval=6))
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%Y-%m"))
+        plt.setp(ax.get_xticklabels(), rotation=45, fontsize=10)
+        return fig
 
     # Tampilkan plot di Streamlit
     st.subheader("Wind Speed Analysis")
-    st.pyplot(fig)
+    st.image(render_cached("wind_speed", df.attrs.get("version"), draw), use_container_width=True)
 
     st.write("Tiga mata angin terkuat yakni WNW (2.28), NW (2.27), dan NNW (2.06).")
     st.write("Dalam visualisasi terlihat bahwa kekuatan kecepatan angin memiliki pola berulang.")
@@ -348,28 +331,120 @@ def visualize_wind_speed(df):
     st.write("Dalam grafik juga teramati bahwa kekuatan angin memiliki tren naik selama rentang tahun 2013-2017.")
 
 
+@view
+def visualize_hourly_series(df):
+    """
+    Menampilkan deret waktu per jam satu polutan untuk satu atau beberapa stasiun.
+    Tiap stasiun diringkas dengan LTTB menjadi sebanyak lebar plot (piksel) titik.
+    """
+    st.subheader("Time Series Per Jam")
+    column = st.selectbox("Polutan", ["PM2.5", "PM10", "SO2", "NO2", "CO", "O3"])
+    stations = list(df["station"].unique())
+    selected = st.multiselect("Stasiun", stations, default=stations[:1])
+    if not selected:
+        st.info("Pilih minimal satu stasiun.")
+        return
+
+    # Jumlah titik per stasiun = lebar plot dalam piksel, bukan jumlah data per jam
+    width = 12
+    points = width * DPI
+
+    def draw():
+        fig, ax = plt.subplots(figsize=(width, 6))
+        for station in selected:
+            times, values = station_series(df, station, column, points)
+            ax.plot(times, values, linewidth=0.7, label=station)
+        ax.set_xlabel("Waktu")
+        ax.set_ylabel(column)
+        ax.set_title(f"{column} per Jam")
+        ax.legend(title="Stasiun")
+        ax.grid(True, linestyle="--", alpha=0.5)
+        fig.autofmt_xdate()
+        return fig
+
+    st.image(render_cached("hourly_series", df.attrs.get("version"), draw, key=(column, *selected)), use_container_width=True)
+    st.write(f"Setiap stasiun digambar dengan paling banyak {points} titik yang dipilih dengan LTTB "
+             "(Largest-Triangle-Three-Buckets), sehingga puncak dan lembah tetap terlihat.")
+
+
+@view
+def visualize_wind_rose(df):
+    """
+    Menampilkan wind rose (arah x kecepatan angin) untuk semua stasiun atau satu stasiun.
+    """
+    st.subheader("Wind Rose")
+    choice = st.selectbox("Stasiun", ["Semua Stasiun", *df["station"].unique()])
+
+    def draw():
+        fig = plt.figure(figsize=(8, 8))
+        ax = fig.add_subplot(projection="polar")
+        # Tabel diambil dari hitungan semua stasiun yang sudah di-cache (wind_rose.wind_counts)
+        plot_wind_rose(ax, rose_table(df, None if choice == "Semua Stasiun" else choice))
+        ax.set_title(f"Wind Rose - {choice}", fontsize=14)
+        ax.legend(title="WSPM", loc="upper left", bbox_to_anchor=(1.05, 1))
+        return fig
+
+    st.image(render_cached("wind_rose", df.attrs.get("version"), draw, key=(choice,)), use_container_width=True)
+    st.write("Panjang batang menunjukkan persentase jam angin bertiup dari arah tersebut, "
+             "warna menunjukkan kelas kecepatan angin (WSPM).")
+
+
+@view
+def show_correlation(df):
+    """
+    Menampilkan matriks korelasi semua kolom numerik untuk seluruh data, satu stasiun
+    dan/atau satu bulan, dari akumulator kovarians yang sudah dihitung (correlation.py).
+    """
+    st.subheader("Matriks Korelasi")
+    station = st.selectbox("Stasiun", ["Semua Stasiun", *df["station"].unique()])
+    months = month_index(rollup(get_cube(df), ["year", "month"]).index).strftime("%Y-%m")
+    month = st.selectbox("Bulan", ["Semua Bulan", *months])
+    year, month_number = (None, None) if month == "Semua Bulan" else map(int, month.split("-"))
+    matrix = correlation_matrix(get_moments(df), None if station == "Semua Stasiun" else station, year, month_number)
+
+    def draw():
+        fig, ax = plt.subplots(figsize=(10, 8))
+        sns.heatmap(matrix, annot=True, fmt=".2f", cmap="coolwarm", vmin=-1, vmax=1, square=True, ax=ax,
+                    cbar_kws={"label": "Korelasi (r)"})
+        ax.set_title(f"Korelasi - {station}, {month}")
+        plt.tight_layout()
+        return fig
+
+    st.image(render_cached("correlation", df.attrs.get("version"), draw, key=(station, month)), use_container_width=True)
+    st.write("Nilai mendekati 1 berarti korelasi positif kuat, mendekati -1 korelasi negatif kuat, dan sekitar 0 tidak berkorelasi.")
+
+
 # Sidebar
 st.sidebar.title("Menu")
 menu = st.sidebar.radio("Pilih Analisis", ["Exploratory", "Analisa dan Visualisasi"])
 
 if menu == "Exploratory":
-    option = st.sidebar.selectbox("Pilih Visualisasi", ["Distribusi Stasiun", "Histogram", "Scatter Plots", "Statistik Stasiun", "Kualitas Udara Berdasar Waktu"])
+    option = st.sidebar.selectbox("Pilih Visualisasi", ["Distribusi Stasiun", "Histogram", "Scatter Plots", "Korelasi", "Statistik Stasiun", "Kualitas Udara Berdasar Waktu"])
     if option == "Distribusi Stasiun":
         visualize_station_distribution(df)
     elif option == "Histogram":
         visualize_histograms(df)
     elif option == "Scatter Plots":
         visualize_scatter_plots(df)
+    elif option == "Korelasi":
+        show_correlation(df)
     elif option == "Statistik Stasiun":
         show_station_statistics(df)
     elif option == "Kualitas Udara Berdasar Waktu":
         show_monthly_averages(df)
 
 elif menu == "Analisa dan Visualisasi":
-    option = st.sidebar.selectbox("Pilih Analisis", ["Peta Interaktif", "Scatter Plot Stasiun", "Kecepatan Angin"])
+    option = st.sidebar.selectbox("Pilih Analisis", ["Peta Interaktif", "Scatter Plot Stasiun", "Kecepatan Angin", "Time Series Per Jam", "Wind Rose"])
     if option == "Peta Interaktif":
         visualize_map(df)
     elif option == "Scatter Plot Stasiun":
         visualize_scatter(df)
     elif option == "Kecepatan Angin":
         visualize_wind_speed(df)
+    elif option == "Time Series Per Jam":
+        visualize_hourly_series(df)
+    elif option == "Wind Rose":
+        visualize_wind_rose(df)
+
+# Panel waktu per view (hanya tampil bila mode debug aktif)
+debug_panel(finish_rerun())
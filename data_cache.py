@@ -0,0 +1,441 @@
+"""
+Cache lokal untuk file yang diunduh dashboard (dataset dan gambar latar).
+
+File disimpan berdasarkan checksum SHA-256 di ``<CACHE_DIR>/objects/<sha256>/<nama file>``
+dan dicatat di ``index.json`` bersama ETag, Last-Modified dan waktu pengecekan terakhir.
+Selama TTL belum habis file langsung dipakai tanpa menyentuh jaringan. Setelah TTL habis
+server ditanya ulang dengan If-None-Match/If-Modified-Since, jawaban 304 cukup
+memperbarui waktu cek. URL yang dijawab 404 juga dicatat, sehingga selama
+``MISSING_TTL`` rerun tidak bertanya lagi ke server.
+
+Unduhan memakai satu session HTTP bersama (connection pool) dengan retry dan backoff.
+Unduhan yang terputus disimpan sebagai file parsial dan dilanjutkan dengan HTTP Range
+pada percobaan berikutnya. Ukuran file dicek terhadap Content-Length/Content-Range,
+dan checksum terhadap header ``Repr-Digest``/``Digest`` atau SHA-256 yang diberikan
+pemanggil. ``fetch_all`` mengunduh beberapa file sekaligus.
+
+Mode offline (``AQ_OFFLINE=1``) tidak pernah mengakses jaringan: file diambil dari cache
+atau dari folder mirror lokal (``AQ_MIRROR_DIR``) sebagai pengganti file server.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from profiling import span
+
+CACHE_DIR = Path(os.environ.get("AQ_CACHE_DIR", ".cache/aq"))
+MIRROR_DIR = os.environ.get("AQ_MIRROR_DIR")
+OFFLINE = os.environ.get("AQ_OFFLINE", "") not in ("", "0")
+DEFAULT_TTL = 24 * 60 * 60  # detik
+MISSING_TTL = 60 * 60  # detik, URL yang 404 tidak ditanyakan ulang selama ini
+CHUNK_SIZE = 1 << 20
+TIMEOUT = 60
+RETRIES = 3
+BACKOFF = 0.5  # detik, digandakan tiap percobaan
+RETRY_STATUS = (429, 500, 502, 503, 504)
+POOL_SIZE = 8
+
+_lock = threading.Lock()  # index.json dan session
+_url_locks = {}  # satu unduhan per URL dalam satu proses
+_session = None
+
+
+class ChecksumError(requests.RequestException):
+    """
+    Isi unduhan tidak cocok dengan ukuran atau checksum yang diharapkan.
+    """
+
+
+def _index_path():
+    return CACHE_DIR / "index.json"
+
+
+def _load_index():
+    try:
+        with open(_index_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_index(index):
+    # Tulis ke file sementara lalu rename agar index tidak pernah setengah jadi
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp, _index_path())
+
+
+def _get_entry(url):
+    with _lock:
+        return _load_index().get(url)
+
+
+def _set_entry(url, entry):
+    # Index dibaca ulang tepat sebelum ditulis: unduhan lain mungkin sudah mengubahnya
+    with _lock:
+        index = _load_index()
+        index[url] = entry
+        _save_index(index)
+
+
+def _url_lock(url):
+    with _lock:
+        return _url_locks.setdefault(url, threading.Lock())
+
+
+def session():
+    """
+    Session HTTP bersama (connection pool) dengan retry dan backoff untuk error
+    koneksi dan status 429/5xx.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            retry = Retry(total=RETRIES, backoff_factor=BACKOFF, status_forcelist=RETRY_STATUS,
+                          allowed_methods=["GET", "HEAD"])
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def content_version(path):
+    """
+    Versi dataset = 12 karakter awal checksum file di cache.
+    """
+    path = Path(path)
+    if path.parent.parent == CACHE_DIR / "objects":
+        return path.parent.name[:12]
+    return file_sha256(path)[:12]
+
+
+def header_sha256(headers):
+    """
+    SHA-256 (hex) dari header ``Repr-Digest``/``Digest`` bila server mengirimnya.
+    """
+    for name in ("Repr-Digest", "Digest"):
+        match = re.search(r"sha-256=:?([A-Za-z0-9+/=]+):?", headers.get(name, ""), re.IGNORECASE)
+        if match:
+            return base64.b64decode(match.group(1)).hex()
+    return None
+
+
+def _store(tmp_path, filename, expected_sha256=None):
+    """
+    Pindahkan file unduhan ke lokasi berdasarkan checksum-nya, setelah checksum
+    dicocokkan dengan ``expected_sha256`` (bila ada).
+    """
+    digest = file_sha256(tmp_path)
+    if expected_sha256 and digest != expected_sha256.lower():
+        os.remove(tmp_path)
+        raise ChecksumError(f"{filename}: checksum {digest} != {expected_sha256}")
+    target = CACHE_DIR / "objects" / digest / filename
+    if target.exists():
+        os.remove(tmp_path)
+    else:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, target)
+    return target, digest
+
+
+def _tmp_file():
+    (CACHE_DIR / "tmp").mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=CACHE_DIR / "tmp")
+    os.close(fd)
+    return tmp
+
+
+def _part_path(url):
+    """
+    File parsial untuk ``url`` (nama tetap agar unduhan bisa dilanjutkan).
+    """
+    return CACHE_DIR / "tmp" / (hashlib.sha256(url.encode()).hexdigest()[:16] + ".part")
+
+
+def _remove_part(part):
+    for path in (part, part.with_suffix(".json")):
+        if path.exists():
+            os.remove(path)
+
+
+def _get(url, entry, part):
+    """
+    Satu request GET ke ``part``: lanjutan dari byte terakhir bila ada file parsial
+    (Range + If-Range), selain itu request kondisional bila file sudah ada di cache.
+    """
+    headers = {"Accept-Encoding": "identity"}  # ukuran di disk = ukuran di header, Range tetap berlaku
+    meta = part.with_suffix(".json")
+    offset = part.stat().st_size if part.exists() else 0
+    validator = json.loads(meta.read_text(encoding="utf-8"))["validator"] if offset and meta.exists() else None
+    if validator:
+        headers.update({"Range": f"bytes={offset}-", "If-Range": validator})
+    elif entry and entry.get("sha256"):
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    with session().get(url, headers=headers, stream=True, timeout=TIMEOUT) as response:
+        if response.status_code == 304:
+            return None, response.headers
+        if response.status_code == 416:  # file parsial tidak cocok lagi, ulang dari awal
+            _remove_part(part)
+            return _get(url, entry, part)
+        response.raise_for_status()
+
+        if response.status_code == 206:
+            expected = int(response.headers["Content-Range"].rsplit("/", 1)[1])
+            mode = "ab"
+        else:
+            length = response.headers.get("Content-Length")
+            expected = int(length) if length is not None else None
+            mode = "wb"
+        # Validator untuk If-Range harus kuat: ETag lemah (W/...) tidak bisa dipakai
+        etag = response.headers.get("ETag")
+        validator = etag if etag and not etag.startswith("W/") else response.headers.get("Last-Modified")
+        if validator:
+            part.parent.mkdir(parents=True, exist_ok=True)
+            meta.write_text(json.dumps({"validator": validator}), encoding="utf-8")
+        elif meta.exists():
+            os.remove(meta)
+
+        with open(part, mode) as f:
+            for block in response.iter_content(CHUNK_SIZE):
+                f.write(block)
+
+    size = part.stat().st_size
+    if expected is not None and size < expected:
+        raise requests.ConnectionError(f"{url}: unduhan terputus ({size}/{expected} byte)")
+    if expected is not None and size > expected:
+        _remove_part(part)
+        raise ChecksumError(f"{url}: ukuran {size} != {expected} byte")
+    return part, response.headers
+
+
+def _download(url, entry):
+    """
+    Unduh ``url`` ke file parsial. Mengembalikan (path, header) atau (None, header)
+    bila server menjawab 304 Not Modified. Koneksi yang putus di tengah unduhan
+    dilanjutkan (sampai RETRIES kali) selama tiap percobaan menambah data.
+    """
+    part = _part_path(url)
+    part.parent.mkdir(parents=True, exist_ok=True)
+    if "drive.google.com" in url:
+        # Google Drive butuh token konfirmasi untuk file besar, serahkan ke gdown
+        import gdown
+
+        if gdown.download(url, str(part), quiet=True, resume=True) is None:
+            raise requests.RequestException(f"Gagal mengunduh {url}")
+        return part, {}
+
+    for attempt in range(RETRIES + 1):
+        size = part.stat().st_size if part.exists() else 0
+        try:
+            return _get(url, entry, part)
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError):
+            grew = part.exists() and part.stat().st_size > size
+            if not grew or attempt == RETRIES:
+                raise
+            time.sleep(BACKOFF * 2 ** attempt)
+
+
+def _from_mirror(filename):
+    if not MIRROR_DIR:
+        return None
+    source = Path(MIRROR_DIR) / filename
+    if not source.exists():
+        return None
+    tmp = _tmp_file()
+    shutil.copyfile(source, tmp)
+    return tmp
+
+
+def _missing(error):
+    response = getattr(error, "response", None)
+    return response is not None and response.status_code in (404, 410)
+
+
+@span("load", "fetch_cached")
+def fetch_cached(url, filename, ttl=DEFAULT_TTL, offline=None, sha256=None):
+    """
+    Kembalikan path lokal untuk ``url``, mengunduh hanya bila perlu. ``sha256``
+    (hex, opsional) adalah checksum yang harus cocok dengan isi file.
+
+    Urutan: cache yang masih segar -> revalidasi ke server -> cache lama
+    (bila jaringan gagal) -> folder mirror lokal.
+    """
+    offline = OFFLINE if offline is None else offline
+
+    with _url_lock(url):
+        entry = _get_entry(url)
+        cached = None
+        if entry and entry.get("sha256"):
+            cached = CACHE_DIR / "objects" / entry["sha256"] / entry["filename"]
+            # File di cache yang tidak cocok dengan checksum yang diminta diunduh ulang utuh
+            if not cached.exists() or (sha256 and entry["sha256"] != sha256.lower()):
+                entry, cached = None, None
+
+        if cached and (offline or time.time() - entry["checked_at"] < ttl):
+            return cached
+        known_missing = entry and entry.get("missing") and time.time() - entry["checked_at"] < MISSING_TTL
+
+        tmp, headers, error = None, {}, None
+        if not offline and not known_missing:
+            try:
+                tmp, headers = _download(url, entry)
+                if tmp is not None:
+                    try:
+                        path, digest = _store(tmp, filename, sha256 or header_sha256(headers))
+                    finally:
+                        _remove_part(tmp)  # juga validator If-Range-nya
+            except requests.RequestException as e:
+                if cached:
+                    return cached  # sajikan data lama daripada gagal
+                if _missing(e):
+                    _set_entry(url, {"filename": filename, "sha256": None, "missing": True, "checked_at": time.time()})
+                tmp, error = None, e
+            else:
+                if tmp is None:  # 304, isi file tidak berubah
+                    _set_entry(url, {**entry, "checked_at": time.time()})
+                    return cached
+
+        if tmp is None:
+            tmp = _from_mirror(filename)
+            if tmp is None and isinstance(error, ChecksumError):
+                raise error  # file ada tetapi isinya tidak cocok
+            if tmp is None:
+                raise FileNotFoundError(f"{filename} tidak tersedia di cache maupun mirror lokal") from error
+            path, digest = _store(tmp, filename, sha256)
+
+        _set_entry(url, {
+            "filename": filename,
+            "sha256": digest,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "checked_at": time.time(),
+        })
+        return path
+
+
+@span("load", "fetch_all")
+def fetch_all(items, ttl=DEFAULT_TTL, offline=None):
+    """
+    Unduh beberapa file sekaligus (satu thread per file, session bersama).
+    ``items`` berisi pasangan (url, nama file); hasilnya path lokal dengan urutan
+    yang sama, atau None untuk file yang gagal diunduh.
+    """
+    def fetch(item):
+        url, filename = item
+        try:
+            return fetch_cached(url, filename, ttl, offline)
+        except (requests.RequestException, FileNotFoundError):
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(items)) as pool:
+        return list(pool.map(fetch, items))
+
+
+def cached_file(filename):
+    """
+    Path file bernama ``filename`` di cache (entri yang paling akhir dicek), atau None.
+    """
+    with _lock:
+        index = _load_index()
+    paths = [(entry["checked_at"], CACHE_DIR / "objects" / entry["sha256"] / filename)
+             for entry in index.values() if entry["filename"] == filename and entry.get("sha256")]
+    paths = [item for item in paths if item[1].exists()]
+    return max(paths)[1] if paths else None
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """
+    Handler file statis dengan dukungan ``Range: bytes=<awal>-`` dan If-Range
+    (Last-Modified), cukup untuk mencoba resume unduhan.
+    """
+
+    def send_head(self):
+        match = re.fullmatch(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        path = self.translate_path(self.path)
+        if match is None or not os.path.isfile(path):
+            return super().send_head()
+        size = os.path.getsize(path)
+        last_modified = self.date_time_string(int(os.path.getmtime(path)))
+        if self.headers.get("If-Range", last_modified) != last_modified:
+            return super().send_head()  # file berubah: kirim utuh
+        start = int(match.group(1))
+        if start >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        f = open(path, "rb")
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        self.send_header("Content-Length", str(size - start))
+        self.send_header("Last-Modified", last_modified)
+        self.end_headers()
+        return f
+
+
+def mirror_server(directory, port=8000, handler=RangeRequestHandler):
+    """
+    File server lokal (belum berjalan) untuk ``directory``; port 0 memilih port bebas.
+    """
+    return ThreadingHTTPServer(("127.0.0.1", port), partial(handler, directory=str(directory)))
+
+
+def serve_mirror(directory, port=8000):
+    """
+    Jalankan file server lokal sederhana sebagai pengganti GitHub/Google Drive,
+    termasuk dukungan Range agar resume unduhan bisa dicoba.
+    """
+    with mirror_server(directory, port) as server:
+        print(f"Mirror lokal: http://127.0.0.1:{server.server_port}/ -> {directory}")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Utilitas cache unduhan dashboard")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="jalankan file server lokal")
+    serve.add_argument("directory")
+    serve.add_argument("--port", type=int, default=8000)
+    fetch = sub.add_parser("fetch", help="unduh file ke cache")
+    fetch.add_argument("url")
+    fetch.add_argument("filename")
+    fetch.add_argument("--sha256", help="checksum SHA-256 yang harus cocok")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve_mirror(args.directory, args.port)
+    else:
+        print(fetch_cached(args.url, args.filename, sha256=args.sha256))
@@ -0,0 +1,641 @@
+"""
+Format dataset kolumnar (Parquet) dengan tipe data ringkas.
+
+CSV asli dibaca pandas sebagai int64/float64/object. Di sini ``station`` dan ``wd``
+disimpan sebagai categorical, kolom kalender sebagai integer kecil, dan kolom polutan
+serta cuaca sebagai float32, sehingga frame di memori beberapa kali lebih kecil
+dan file Parquet (zstd) bisa dibaca dalam waktu kurang dari satu detik.
+
+Baris disimpan terurut per stasiun (lalu waktu) dengan satu row group per stasiun,
+sehingga halaman per stasiun cukup membaca row group stasiun itu saja
+(``load_station``) atau mengambil potongan baris di memori (``select_station``).
+
+Data per jam yang di-ingest belakangan (lihat ``ingest.py``) disimpan sebagai file
+Parquet tambahan; ``LazyDataset`` membaca file dasar dan file tambahan sebagai satu dataset.
+
+Waktu tiap baris tidak disimpan di file; ``time_index`` merakitnya sekali per versi
+dataset dari kolom year, month, day dan hour sebagai DatetimeIndex (deret per jam).
+Filter rentang waktu (``select_time``) memakai kunci waktu terurut per stasiun
+(``time_keys``) sehingga tiap stasiun cukup dicari dengan ``searchsorted``.
+
+CSV yang lebih besar dari ``STREAM_CSV_BYTES`` dikonversi per chunk (``write_parquet_chunks``)
+sehingga konversi tidak perlu memuat seluruh CSV ke memori.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pandas.api.types import union_categoricals
+
+from data_cache import content_version
+from memo import WINDOW_MARK, BoundedCache, memoize
+from profiling import span
+
+CALENDAR_COLUMNS = ["year", "month", "day", "hour"]
+NUMERIC_COLUMNS = ["PM2.5", "PM10", "SO2", "NO2", "CO", "O3", "TEMP", "PRES", "DEWP", "RAIN", "WSPM"]
+WIND_DIRECTIONS = ["N", "NNE", "NE", "ENE", "E", "ESE", "SE", "SSE",
+                   "S", "SSW", "SW", "WSW", "W", "WNW", "NW", "NNW"]
+COLUMNS = ["No", *CALENDAR_COLUMNS, *NUMERIC_COLUMNS, "wd", "station"]
+TIME_COLUMN = "time"  # kolom turunan di LazyDataset, dirakit dari CALENDAR_COLUMNS
+
+DTYPES = {
+    "No": "int32",
+    "year": "int16",
+    "month": "int8",
+    "day": "int8",
+    "hour": "int8",
+    **{col: "float32" for col in NUMERIC_COLUMNS},
+    "wd": pd.CategoricalDtype(WIND_DIRECTIONS),
+    "station": "category",
+}
+
+COMPRESSION = "zstd"
+CHUNK_ROWS = 50_000
+STREAM_CSV_BYTES = int(os.environ.get("AQ_STREAM_CSV_BYTES", 256 * 2**20))  # di atas ini dikonversi per chunk
+STREAM_CHUNK_ROWS = 1_000_000
+
+_convert_lock = threading.Lock()
+_convert_locks = {}  # satu konversi per file Parquet dalam satu proses
+
+
+def build_time(df):
+    """
+    Waktu tiap baris (datetime64) dari kolom year, month, day dan hour, dirakit
+    secara vektor tanpa string perantara.
+    """
+    parts = {col: df[col].to_numpy(dtype="int64") for col in CALENDAR_COLUMNS}
+    return pd.to_datetime(parts).rename(TIME_COLUMN)
+
+
+def read_csv_typed(source, **kwargs):
+    """
+    Baca CSV dataset langsung dengan tipe data ringkas (tanpa tahap int64/object).
+    """
+    return pd.read_csv(source, dtype=DTYPES, **kwargs)
+
+
+def concat_frames(chunks):
+    """
+    Gabungkan chunk (frame dengan kolom yang sama) kolom per kolom; kolom categorical
+    digabung dengan ``union_categoricals``. Chunk tidak disimpan utuh dan potongan tiap
+    kolom dilepas setelah kolom itu digabung, sehingga puncak memori = frame hasil + satu
+    kolom, bukan dua kali frame.
+    """
+    parts = {}
+    for chunk in chunks:
+        for col in chunk.columns:
+            values = chunk[col]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                array = values.array
+            else:
+                array = values.to_numpy()
+                # Kolom sejenis bisa berbagi satu blok 2D (konsolidasi pandas): view satu
+                # kolom akan menahan seluruh blok chunk, jadi disalin
+                if array.base is not None and array.base.ndim > 1:
+                    array = array.copy()
+            parts.setdefault(col, []).append(array)
+
+    columns = {}
+    for col in list(parts):
+        arrays = parts.pop(col)
+        if isinstance(arrays[0], pd.Categorical):
+            columns[col] = union_categoricals(arrays, sort_categories=col != "wd")
+        else:
+            columns[col] = np.concatenate(arrays)
+    return pd.DataFrame(columns, copy=False)
+
+
+def csv_chunks(path, chunksize=CHUNK_ROWS, member=None):
+    """
+    Chunk bertipe ringkas dari file CSV atau dari CSV di dalam ZIP (dibaca langsung
+    dari arsip, tanpa ekstraksi ke disk).
+    """
+    path = Path(path)
+    if path.suffix != ".zip":
+        with read_csv_typed(path, chunksize=chunksize) as reader:
+            yield from reader
+        return
+    with zipfile.ZipFile(path) as archive:
+        if member is None:
+            member = next(name for name in archive.namelist() if name.endswith(".csv"))
+        with archive.open(member) as f, read_csv_typed(f, chunksize=chunksize) as reader:
+            yield from reader
+
+
+def read_zip_csv(zip_path, member=None, chunksize=CHUNK_ROWS):
+    """
+    Baca CSV di dalam ZIP langsung dari arsip per chunk, tanpa ekstraksi ke disk
+    dan tanpa menyimpan isi ZIP di memori.
+    """
+    return concat_frames(csv_chunks(zip_path, chunksize, member))
+
+
+def sort_by_station(df):
+    """
+    Urutkan baris per stasiun lalu waktu, dan tandai frame sebagai terurut.
+    """
+    keys = [col for col in ["station", *CALENDAR_COLUMNS] if col in df.columns]
+    df = df.sort_values(keys, kind="stable", ignore_index=True)
+    df.attrs["sorted_by"] = "station"
+    return df
+
+
+def sorted_categories(column):
+    """
+    Kolom categorical dengan kategori terurut nama. File hasil ``write_parquet_chunks``
+    menyimpan kamus station per chunk, yang saat dibaca digabung menurut urutan muncul.
+    """
+    if not column.cat.categories.is_monotonic_increasing:
+        column = column.cat.reorder_categories(column.cat.categories.sort_values())
+    return column
+
+
+def station_bounds(df):
+    """
+    Batas (start, stop) baris tiap stasiun pada frame yang terurut per stasiun.
+    """
+    codes = df["station"].cat.codes.to_numpy()
+    starts = np.flatnonzero(np.diff(codes)) + 1
+    return list(zip([0, *starts], [*starts, len(df)]))
+
+
+def _temp_path(path):
+    """
+    File sementara unik di folder ``path``; file ditulis di sini lalu ``os.replace``,
+    sehingga pembaca lain tidak pernah melihat file Parquet setengah jadi.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    os.close(fd)
+    return Path(tmp)
+
+
+def write_parquet(df, path):
+    """
+    Simpan dataset terurut per stasiun, satu row group per stasiun (atomik).
+    """
+    path = Path(path)
+    df = sort_by_station(df.astype({col: dtype for col, dtype in DTYPES.items() if col in df.columns}))
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp = _temp_path(path)
+    try:
+        with pq.ParquetWriter(tmp, table.schema, compression=COMPRESSION) as writer:
+            for start, stop in station_bounds(df):
+                writer.write_table(table.slice(start, stop - start), row_group_size=stop - start)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def write_parquet_chunks(chunks, path):
+    """
+    Simpan chunk demi chunk ke satu file Parquet; memori yang dipakai hanya satu chunk.
+    Tiap chunk diurutkan per stasiun dan ditulis sebagai satu row group per stasiun,
+    jadi ``load_station`` tetap bisa melewati row group stasiun lain, tetapi file
+    tidak terurut global (``time_keys`` membuat urutannya sekali bila perlu).
+    """
+    path = Path(path)
+    tmp = _temp_path(path)
+    writer = None
+    try:
+        for chunk in chunks:
+            chunk = sort_by_station(chunk)
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            # Kamus station berbeda per chunk; indeks int32 agar skema semua chunk sama
+            index = table.schema.get_field_index("station")
+            table = table.set_column(index, "station", table["station"].cast(pa.dictionary(pa.int32(), pa.string())))
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema, compression=COMPRESSION)
+            for start, stop in station_bounds(chunk):
+                writer.write_table(table.slice(start, stop - start), row_group_size=stop - start)
+        if writer is None:
+            raise ValueError(f"{path}: tidak ada baris untuk ditulis")
+        writer.close()
+        os.replace(tmp, path)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def convert(csv_path, parquet_path=None):
+    """
+    Konversi CSV dataset (atau ZIP berisi CSV) menjadi file Parquet terkompresi.
+    """
+    csv_path = Path(csv_path)
+    parquet_path = Path(parquet_path) if parquet_path else csv_path.with_suffix(".parquet")
+    if csv_path.stat().st_size > STREAM_CSV_BYTES:
+        return write_parquet_chunks(csv_chunks(csv_path, STREAM_CHUNK_ROWS), parquet_path)
+    if csv_path.suffix == ".zip":
+        return write_parquet(read_zip_csv(csv_path), parquet_path)
+    return write_parquet(read_csv_typed(csv_path), parquet_path)
+
+
+def _complete_parquet(path):
+    """
+    Apakah ``path`` file Parquet utuh (footer terbaca), bukan sisa konversi yang terputus.
+    """
+    try:
+        pq.read_metadata(path)
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return False
+    return True
+
+
+def _convert_lock_for(path):
+    with _convert_lock:
+        return _convert_locks.setdefault(path, threading.Lock())
+
+
+def parquet_source(path):
+    """
+    Path Parquet dan versi dataset untuk file .parquet, .csv atau .zip berisi CSV.
+
+    File CSV/ZIP dikonversi sekali ke Parquet di folder yang sama (untuk file di cache,
+    folder ini sudah unik per checksum) sehingga load berikutnya membaca Parquet.
+    Konversi ditulis atomik dan dijalankan satu per file dalam satu proses; sesi lain
+    menunggu konversi selesai, dan file Parquet yang rusak dikonversi ulang. Proses
+    lain yang mengonversi bersamaan hanya mengulang kerja, tidak pernah membaca file
+    setengah jadi.
+    """
+    path = Path(path)
+    version = content_version(path)
+    if path.suffix in (".csv", ".zip"):
+        parquet_path = path.with_suffix(".parquet")
+        with _convert_lock_for(parquet_path):
+            if not _complete_parquet(parquet_path):
+                with span("load", f"convert {path.name}"):
+                    convert(path, parquet_path)
+        path = parquet_path
+    return path, version
+
+
+def station_row_groups(parquet_file, station):
+    """
+    Indeks row group yang mungkin berisi ``station``, dari statistik min/max di footer.
+    """
+    meta = parquet_file.metadata
+    index = parquet_file.schema_arrow.get_field_index("station")
+    groups = []
+    for i in range(meta.num_row_groups):
+        stats = meta.row_group(i).column(index).statistics
+        if stats is None or not stats.has_min_max or stats.min <= station <= stats.max:
+            groups.append(i)
+    return groups
+
+
+@span("load", "load_station")
+def load_station(path, station, columns=None):
+    """
+    Load hanya baris satu stasiun dari file Parquet: row group stasiun lain
+    dilewati tanpa dibaca dari disk.
+    """
+    path = Path(path)
+    parquet_file = pq.ParquetFile(path)
+    read_columns = None if columns is None else list(dict.fromkeys([*columns, "station"]))
+    table = parquet_file.read_row_groups(station_row_groups(parquet_file, station), columns=read_columns)
+    df = table.to_pandas()
+    df = df[df["station"] == station].reset_index(drop=True)
+    if columns is not None:
+        df = df[list(columns)]
+    version = content_version(path)
+    df.attrs["version"] = f"{version}/{station}"
+    return df
+
+
+class LazyDataset:
+    """
+    Handle dataset yang memuat kolom dari Parquet saat pertama kali diakses lalu
+    menyimpannya, sehingga sesi yang hanya membuka satu view tidak membayar kolom lain.
+
+    Mendukung bagian API DataFrame yang dipakai view: ``df["kolom"]``,
+    ``df[[kolom, ...]]``, ``df.columns``, ``df.attrs`` dan ``df.head()``.
+    ``df["time"]`` adalah kolom turunan (lihat ``build_time``), dirakit sekali
+    saat pertama diakses.
+
+    ``batches`` adalah file Parquet tambahan (data hasil ingest) yang dibaca setelah
+    file dasar; ``version`` menggantikan versi file dasar bila diberikan.
+    """
+
+    def __init__(self, path, batches=(), version=None):
+        self.path, base_version = parquet_source(path)
+        self.batches = [Path(p) for p in batches]
+        self._files = [pq.ParquetFile(p) for p in [self.path, *self.batches]]
+        self._file = self._files[0]
+        self.columns = pd.Index(self._file.schema_arrow.names)
+        self._loaded = {}
+        self._stations = BoundedCache(maxsize=16, ttl=None)
+        self._lock = threading.Lock()
+        self.attrs = {"version": version or base_version}
+        if "station" in self.columns and self["station"].cat.codes.is_monotonic_increasing:
+            self.attrs["sorted_by"] = "station"
+
+    def __repr__(self):
+        return f"LazyDataset({str(self.path)!r}, batches={len(self.batches)}, loaded={list(self._loaded)})"
+
+    def __len__(self):
+        return sum(f.metadata.num_rows for f in self._files)
+
+    @property
+    def files(self):
+        """
+        Semua file Parquet dataset ini (file dasar lalu batch), untuk agregasi out-of-core.
+        """
+        return [self.path, *self.batches]
+
+    def _ensure(self, columns):
+        if TIME_COLUMN in columns and TIME_COLUMN not in self.columns:
+            self._ensure(CALENDAR_COLUMNS)
+        with self._lock:
+            missing = [col for col in columns if col not in self._loaded]
+            if TIME_COLUMN in missing and TIME_COLUMN not in self.columns:
+                missing.remove(TIME_COLUMN)
+                self._loaded[TIME_COLUMN] = pd.Series(build_time(self._loaded).to_numpy(), name=TIME_COLUMN)
+            if missing:
+                with span("load", "read " + ", ".join(missing)):
+                    frames = [pd.read_parquet(p, engine="pyarrow", columns=missing) for p in self.files]
+                    frame = frames[0] if len(frames) == 1 else concat_frames(frames)
+                for col in missing:
+                    self._loaded[col] = sorted_categories(frame[col]) if col == "station" else frame[col]
+
+    def load(self, columns=None):
+        """
+        DataFrame berisi ``columns`` (default semua kolom), memuat yang belum ada.
+        """
+        columns = list(self.columns if columns is None else columns)
+        self._ensure(columns)
+        df = pd.DataFrame({col: self._loaded[col] for col in columns}, copy=False)
+        df.attrs = dict(self.attrs)
+        return df
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            self._ensure([key])
+            return self._loaded[key]
+        return self.load(key)
+
+    def head(self, n=5):
+        with self._lock:
+            batch = next(self._file.iter_batches(batch_size=n))
+        return batch.to_pandas()
+
+    def station(self, station):
+        """
+        Semua kolom untuk satu stasiun, dibaca dari row group stasiun itu saja.
+        """
+        df_station = self._stations.get(station)
+        if df_station is None:
+            parts = [load_station(p, station) for p in self.files]
+            parts = [part for part in parts if len(part)] or parts[:1]
+            df_station = parts[0] if len(parts) == 1 else concat_frames(parts)
+            df_station.attrs = {"version": f"{self.attrs['version']}/{station}", "sorted_by": "station"}
+            self._stations.put(station, df_station)
+        return df_station
+
+
+class LazyWindow:
+    """
+    Potongan baris ``LazyDataset`` (hasil ``select_time``) yang memotong tiap kolom saat
+    pertama diakses, sehingga kolom yang tidak dipakai view tidak pernah dibaca.
+    ``rows`` adalah slice atau array posisi baris di dataset asal, ``bounds`` rentang
+    waktu ``[start, end)`` untuk data per stasiun yang dibaca dari row group.
+
+    Mendukung API yang sama dengan ``LazyDataset``; ``files`` None sehingga agregasi
+    dibangun di memori dari kolom potongan.
+    """
+
+    files = None
+
+    def __init__(self, source, rows, bounds, attrs):
+        self.source, self.rows, self.bounds = source, rows, bounds
+        self.columns = source.columns
+        self.attrs = attrs
+        self._loaded = {}
+        self._stations = BoundedCache(maxsize=16, ttl=None)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"LazyWindow({self.source!r}, rows={len(self)}, loaded={list(self._loaded)})"
+
+    def __len__(self):
+        return self.rows.stop - self.rows.start if isinstance(self.rows, slice) else len(self.rows)
+
+    def _column(self, col):
+        with self._lock:
+            if col not in self._loaded:
+                column = self.source[col]
+                part = column.iloc[self.rows] if isinstance(self.rows, slice) else column.take(self.rows)
+                self._loaded[col] = part.reset_index(drop=True)
+            return self._loaded[col]
+
+    def load(self, columns=None):
+        """
+        DataFrame berisi ``columns`` (default semua kolom) untuk baris potongan ini.
+        """
+        columns = list(self.columns if columns is None else columns)
+        df = pd.DataFrame({col: self._column(col) for col in columns}, copy=False)
+        df.attrs = dict(self.attrs)
+        return df
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._column(key)
+        return self.load(key)
+
+    def head(self, n=5):
+        # Baris terurut per stasiun: cukup baca stasiun pertama (lalu berikutnya bila kurang)
+        parts, rows = [], 0
+        for station in self["station"].unique():
+            if rows >= n:
+                break
+            parts.append(self.station(station).head(n - rows))
+            rows += len(parts[-1])
+        parts = parts or [self.source.head(0)]
+        return (parts[0] if len(parts) == 1 else concat_frames(parts)).reset_index(drop=True)
+
+    def station(self, station):
+        """
+        Semua kolom untuk satu stasiun di rentang waktu potongan ini, dibaca dari row
+        group stasiun itu saja.
+        """
+        df_station = self._stations.get(station)
+        if df_station is None:
+            df_station = self.source.station(station)
+            keys = build_time(df_station).to_numpy().astype("datetime64[h]")
+            start, end = np.array(self.bounds, dtype="datetime64[h]")
+            df_station = df_station[(keys >= start) & (keys < end)].reset_index(drop=True)
+            df_station.attrs = {"version": f"{self.attrs['version']}/{station}", "sorted_by": "station"}
+            self._stations.put(station, df_station)
+        return df_station
+
+
+@memoize(maxsize=4, ttl=None, phase="load")
+def open_dataset(path):
+    """
+    Buka dataset secara lazy (lihat ``LazyDataset``), di-memoize per path.
+    """
+    return LazyDataset(path)
+
+
+@memoize(maxsize=16, ttl=None)
+def time_index(df):
+    """
+    DatetimeIndex waktu tiap baris ``df``, dirakit sekali per versi dataset.
+    """
+    if isinstance(df, LazyDataset):
+        return pd.DatetimeIndex(df[TIME_COLUMN], name=TIME_COLUMN)
+    return pd.DatetimeIndex(build_time(df), name=TIME_COLUMN)
+
+
+def station_slice(df, station):
+    """
+    Potongan baris (slice) satu stasiun. Pada frame terurut dicari dengan
+    ``searchsorted`` (O(log n)), selain itu dengan mask boolean.
+    """
+    if df.attrs.get("sorted_by") == "station":
+        column = df["station"]
+        if station not in column.cat.categories:
+            return slice(0, 0)
+        code = column.cat.categories.get_loc(station)
+        start, stop = np.searchsorted(column.cat.codes.to_numpy(), [code, code + 1])
+        return slice(int(start), int(stop))
+    return (df["station"] == station).to_numpy()
+
+
+def select_station(df, station):
+    """
+    Baris milik satu stasiun (view tanpa salinan bila frame terurut per stasiun).
+    Versi frame hasil diberi akhiran nama stasiun agar tidak tertukar dengan
+    frame lengkap di cache.
+    """
+    if isinstance(df, (LazyDataset, LazyWindow)):
+        return df.station(station)
+    rows = station_slice(df, station)
+    df_station = df.iloc[rows] if isinstance(rows, slice) else df[rows]
+    version = df.attrs.get("version")
+    df_station.attrs = {**df.attrs, "version": f"{version}/{station}" if version else None}
+    return df_station
+
+
+@memoize(maxsize=4, ttl=None)
+def time_keys(df):
+    """
+    Kunci waktu (jam sejak epoch) terurut per stasiun lalu waktu, dirakit sekali per
+    versi dataset. Mengembalikan ``(keys, starts, order)``: ``keys[starts[c]:starts[c + 1]]``
+    adalah waktu stasiun berkode ``c`` secara terurut, dan ``order`` memetakan posisi
+    terurut ke baris ``df`` (None bila baris sudah terurut, mis. file hasil ``write_parquet``).
+    """
+    keys = time_index(df).to_numpy().astype("datetime64[h]").astype("int64")
+    station = df["station"]
+    codes = station.cat.codes.to_numpy()
+    ordered = (codes[1:] > codes[:-1]) | ((codes[1:] == codes[:-1]) & (keys[1:] >= keys[:-1]))
+    order = None
+    if not ordered.all():
+        # Mis. dataset dengan batch hasil ingest: urutan dibuat sekali, baris tidak disalin
+        order = np.lexsort((keys, codes))
+        keys, codes = keys[order], codes[order]
+    starts = np.searchsorted(codes, np.arange(len(station.cat.categories) + 1))
+    return keys, starts, order
+
+
+def time_range(df):
+    """
+    (awal, akhir) waktu data ``df`` sebagai Timestamp.
+    """
+    keys = time_keys(df)[0]
+    return tuple(pd.Timestamp(np.datetime64(int(k), "h")) for k in (keys.min(), keys.max()))
+
+
+def time_rows(df, start, end, station=None):
+    """
+    Posisi (start, stop) baris dalam rentang waktu ``[start, end)`` untuk tiap stasiun
+    (atau satu ``station``) pada urutan ``time_keys``: satu ``searchsorted`` per stasiun.
+    """
+    keys, starts, _ = time_keys(df)
+    bounds = np.array([start, end], dtype="datetime64[h]").astype("int64")
+    if station is None:
+        codes = range(len(starts) - 1)
+    else:
+        categories = df["station"].cat.categories
+        codes = [categories.get_loc(station)] if station in categories else []
+    rows = []
+    for code in codes:
+        lo, hi = starts[code], starts[code + 1]
+        first, last = lo + np.searchsorted(keys[lo:hi], bounds)
+        if last > first:
+            rows.append((int(first), int(last)))
+    return rows
+
+
+def existing_rows(df, other):
+    """
+    Mask baris ``other`` yang (station, jam)-nya sudah ada di ``df``. Kunci gabungan
+    (kode stasiun, jam) dari ``time_keys(df)`` sudah terurut, jadi semua baris ``other``
+    dicari sekaligus dengan satu ``searchsorted``.
+    """
+    if len(other) == 0:
+        return np.zeros(0, dtype=bool)
+    keys, starts, _ = time_keys(df)
+    other_keys = build_time(other).to_numpy().astype("datetime64[h]").astype("int64")
+    codes = df["station"].cat.categories.get_indexer(other["station"].astype(str))
+    low = min(keys.min(), other_keys.min())
+    span = max(keys.max(), other_keys.max()) - low + 1
+    existing = np.repeat(np.arange(len(starts) - 1), np.diff(starts)) * span + (keys - low)
+    wanted = codes * span + (other_keys - low)
+    found = existing[np.minimum(np.searchsorted(existing, wanted), len(existing) - 1)] == wanted
+    return found & (codes >= 0)
+
+
+@memoize(maxsize=8, ttl=None)
+def select_time(df, start, end, station=None):
+    """
+    Baris dalam rentang waktu ``[start, end)`` (opsional satu ``station``), terurut per
+    stasiun lalu waktu. Potongan satu stasiun pada frame terurut adalah view tanpa
+    salinan; potongan beberapa stasiun dirakit dari potongan per stasiun, sehingga
+    biayanya sebanding jumlah baris di rentang, bukan ukuran dataset. Potongan
+    ``LazyDataset`` adalah ``LazyWindow`` yang hanya memotong kolom yang dipakai view.
+    Rentang yang mencakup seluruh data mengembalikan ``df`` apa adanya (cube dan gambar
+    yang sudah ada tetap dipakai). Versi frame hasil diberi akhiran rentang waktunya;
+    artefak untuk versi itu hanya di-cache di memori (``memo.persistent``).
+    """
+    first, last = time_range(df)
+    if station is None and start <= first and end > last:
+        return df
+
+    order = time_keys(df)[2]
+    rows = time_rows(df, start, end, station)
+    if order is None and len(rows) == 1:
+        rows = slice(*rows[0])
+    else:
+        positions = np.concatenate([np.arange(lo, hi) for lo, hi in rows] or [np.array([], dtype="int64")])
+        rows = positions if order is None else order[positions]
+    version = df.attrs.get("version")
+    suffix = f"{start:%Y%m%d%H}-{end:%Y%m%d%H}" + (f"/{station}" if station is not None else "")
+    attrs = {"version": f"{version}{WINDOW_MARK}{suffix}" if version else None, "sorted_by": "station"}
+    if isinstance(df, LazyDataset):
+        return LazyWindow(df, rows, (start, end), attrs)
+
+    window = df.iloc[rows] if isinstance(rows, slice) else df.take(rows)
+    window = window.set_axis(pd.RangeIndex(len(window)))
+    window.attrs = attrs
+    return window
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Konversi dataset CSV ke Parquet")
+    parser.add_argument("csv")
+    parser.add_argument("-o", "--output", help="path file .parquet (default: nama CSV dengan ekstensi .parquet)")
+    args = parser.parse_args()
+
+    output = convert(args.csv, args.output)
+    print(f"Tersimpan: {output} ({output.stat().st_size / 1e6:.1f} MB)")
@@ -0,0 +1,59 @@
+"""
+Decimation deret waktu per jam sebelum digambar.
+
+Satu stasiun punya ~35 ribu titik per jam untuk tiap polutan, jauh lebih banyak dari
+jumlah piksel lebar plot. Largest-Triangle-Three-Buckets (LTTB) memilih satu titik per
+bucket, yaitu titik yang membentuk segitiga terbesar dengan titik terpilih sebelumnya
+dan rata-rata bucket berikutnya, sehingga puncak dan lembah tetap terlihat. Jumlah
+titik hasil ditentukan lebar plot dalam piksel, jadi biaya render tidak tergantung
+panjang data.
+"""
+import numpy as np
+
+from dataset import select_station, time_index
+from memo import memoize
+
+
+def lttb(x, y, threshold):
+    """
+    Indeks ``threshold`` titik terpilih dari (x, y) yang terurut menurut x.
+    Titik pertama dan terakhir selalu ikut.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # threshold - 2 bucket untuk titik 1 .. n-2; edges[i]:edges[i + 1] adalah bucket i
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype("int64") + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype="int64")
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[stop:next_stop].mean(), y[stop:next_stop].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+@memoize(maxsize=64)
+def station_series(df, station, column, threshold):
+    """
+    (waktu, nilai) per jam ``column`` untuk satu stasiun, terurut waktu, paling banyak
+    ``threshold`` titik (LTTB). Jam tanpa nilai dilewati.
+    """
+    df_station = select_station(df, station)
+    times = time_index(df_station).to_numpy()
+    values = df_station[column].to_numpy(dtype="float64", na_value=np.nan)
+    valid = ~np.isnan(values)
+    times, values = times[valid], values[valid]
+    # Batch ingest untuk jam yang lebih awal disimpan setelah data lama, jadi baris
+    # stasiun belum tentu terurut waktu; LTTB butuh x terurut
+    if (np.diff(times) < np.timedelta64(0)).any():
+        order = np.argsort(times, kind="stable")
+        times, values = times[order], values[order]
+    selected = lttb(times.astype("datetime64[s]").astype("float64"), values, threshold)
+    return times[selected], values[selected]
@@ -0,0 +1,80 @@
+"""
+Cache gambar hasil render matplotlib.
+
+Gambar disimpan sebagai bytes PNG/SVG dengan kunci (view, kunci tambahan seperti
+stasiun, versi dataset) di memori dan di ``<CACHE_DIR>/figures/<versi>/``; gambar
+potongan rentang waktu hanya di memori.
+View yang sudah pernah digambar untuk dataset yang sama tidak lagi menjalankan
+matplotlib, cukup mengirim bytes yang tersimpan.
+"""
+import io
+import os
+import re
+import tempfile
+
+import matplotlib
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+from data_cache import CACHE_DIR
+from memo import BoundedCache, persistent, register
+from profiling import span
+
+FIGURE_DIR = CACHE_DIR / "figures"
+DPI = 200  # sama dengan default st.pyplot
+REVISION = 2  # naikkan bila cara menggambar view berubah, agar gambar lama di disk tidak dipakai
+
+_figures = BoundedCache(maxsize=64, ttl=None)
+register("figures.render_cached", _figures)
+
+
+def figure_bytes(fig, fmt="png"):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=DPI, bbox_inches="tight")
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def figure_path(view, version, key=(), fmt="png"):
+    name = "-".join([view, *(re.sub(r"[^\w.]+", "_", str(k)) for k in key)])
+    return FIGURE_DIR / version / f"{name}-r{REVISION}.{fmt}"
+
+
+def _draw(view, draw, fmt):
+    with span("render", view):
+        fig = draw()
+    with span("serialize", view):
+        return figure_bytes(fig, fmt)
+
+
+def render_cached(view, version, draw, key=(), fmt="png"):
+    """
+    Bytes gambar untuk ``view``. ``draw()`` (mengembalikan Figure) hanya dipanggil
+    bila gambar belum ada di memori maupun di disk. Tanpa versi dataset gambar
+    selalu digambar ulang.
+    """
+    if version is None:
+        return _draw(view, draw, fmt)
+
+    key = tuple(key)
+    cache_key = (view, version, key, fmt)
+    data = _figures.get(cache_key)
+    if data is not None:
+        return data
+
+    path = figure_path(view, version, key, fmt) if persistent(version) else None
+    if path is not None and path.exists():
+        with span("load", view):
+            data = path.read_bytes()
+    else:
+        data = _draw(view, draw, fmt)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+    _figures.put(cache_key, data)
+    return data
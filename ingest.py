@@ -0,0 +1,205 @@
+"""
+Ingest data per jam yang baru dari folder drop.
+
+Batch CSV baru (kolom sama dengan dataset asli, satu atau beberapa stasiun per file)
+diletakkan di ``AQ_DROP_DIR``. Tiap batch disimpan sebagai file Parquet tambahan di
+``<CACHE_DIR>/store/<versi dasar>/`` tanpa menulis ulang data lama, lalu cube agregat
+versi baru dibentuk dari cube lama digabung cube batch (``cube.merge_cubes``).
+Rata-rata bulanan, ringkasan angin dan rata-rata per stasiun yang di-rollup dari cube
+ikut terbarui tanpa memindai ulang riwayat data per jam. Sketch kuantil
+(``sketch.merge_sketches``), akumulator korelasi (``correlation.merge_moments``) dan
+akumulator AQI (``aqi.merge_aqi_tables``) diperbarui dengan cara yang sama, dan
+statistik deskriptif (``summary``) dihitung sekali untuk versi baru.
+
+Dashboard membuka dataset lewat ``open_live`` sehingga batch yang sudah di-ingest
+langsung terlihat pada rerun berikutnya. Jalankan pemantau folder drop dengan::
+
+    python ingest.py <file dataset> --watch
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from aqi import build_aqi_table, get_aqi_table, merge_aqi_tables, save_aqi_table
+from correlation import build_moments, get_moments, merge_moments, save_moments
+from cube import build_cube, get_cube, merge_cubes, save_cube
+from data_cache import CACHE_DIR, file_sha256
+from dataset import (CALENDAR_COLUMNS, COLUMNS, LazyDataset, existing_rows, open_dataset, parquet_source,
+                     read_csv_typed, write_parquet)
+from memo import memoize
+from sketch import build_sketch, get_sketch, merge_sketches, save_sketch
+from summary import build_summary, save_summary
+
+STORE_DIR = CACHE_DIR / "store"
+DROP_DIR = Path(os.environ.get("AQ_DROP_DIR", "data/incoming"))
+POLL_INTERVAL = 30  # detik
+
+
+def store_dir(base_version):
+    return STORE_DIR / base_version
+
+
+def read_manifest(base_version):
+    """
+    Manifest store untuk dataset dasar ``base_version``, atau None bila belum ada ingest.
+    """
+    try:
+        with open(store_dir(base_version) / "manifest.json", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _write_manifest(manifest):
+    directory = store_dir(manifest["base_version"])
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, directory / "manifest.json")
+
+
+def store_version(base_version, batches):
+    """
+    Versi dataset setelah ingest: checksum dari versi dasar dan checksum semua batch.
+    """
+    h = hashlib.sha256(base_version.encode())
+    for batch in batches:
+        h.update(batch["sha256"].encode())
+    return h.hexdigest()[:12]
+
+
+@memoize(maxsize=4, ttl=None, phase="load")
+def _open_store(path, batches, version):
+    return LazyDataset(path, batches, version)
+
+
+def _dataset(path, manifest):
+    batches = tuple(str(store_dir(manifest["base_version"]) / b["file"]) for b in manifest["batches"])
+    return _open_store(str(path), batches, manifest["version"])
+
+
+def open_live(source):
+    """
+    Dataset ``source`` beserta semua batch yang sudah di-ingest (bila ada).
+    """
+    path, base_version = parquet_source(source)
+    manifest = read_manifest(base_version)
+    if manifest is None or not manifest["batches"]:
+        return open_dataset(source)
+    return _dataset(path, manifest)
+
+
+def ingest_file(source, csv_path):
+    """
+    Tambahkan satu batch CSV ke dataset ``source``. Mengembalikan versi dataset
+    baru, atau None bila file yang sama sudah pernah di-ingest. Batch berisi
+    (station, jam) yang sudah ada di dataset atau ganda di batch itu sendiri ditolak
+    (ValueError), karena cube, sketch dan akumulator korelasi tidak bisa dikoreksi
+    setelah digabung.
+    """
+    path, base_version = parquet_source(source)
+    manifest = read_manifest(base_version) or {
+        "base": str(path), "base_version": base_version, "version": base_version, "batches": [],
+    }
+    digest = file_sha256(csv_path)
+    if any(b["sha256"] == digest for b in manifest["batches"]):
+        return None
+
+    batch = read_csv_typed(csv_path)
+    missing = [col for col in COLUMNS if col not in batch.columns]
+    if missing:
+        raise ValueError(f"{csv_path}: kolom tidak ada: {', '.join(missing)}")
+
+    current = _dataset(path, manifest) if manifest["batches"] else open_dataset(source)
+    overlap = existing_rows(current, batch) | batch.duplicated(["station", *CALENDAR_COLUMNS]).to_numpy()
+    if overlap.any():
+        raise ValueError(f"{csv_path}: {int(overlap.sum())} baris berisi (station, jam) yang sudah ada")
+
+    # Cube versi sekarang: dari disk bila ada, dibangun sekali bila belum pernah
+    old_cube = get_cube(current)
+    old_sketch = get_sketch(current)
+    old_moments = get_moments(current)
+    old_aqi = get_aqi_table(current)
+
+    batch_file = Path("batches") / f"{digest[:12]}.parquet"
+    (store_dir(base_version) / batch_file).parent.mkdir(parents=True, exist_ok=True)
+    write_parquet(batch[COLUMNS], store_dir(base_version) / batch_file)
+
+    batches = [*manifest["batches"], {
+        "file": batch_file.as_posix(), "sha256": digest, "source": Path(csv_path).name,
+        "rows": len(batch), "stations": sorted(batch["station"].dropna().unique().astype(str)),
+    }]
+    version = store_version(base_version, batches)
+
+    batch_cube = build_cube(batch)
+    cube = merge_cubes([old_cube, batch_cube])
+    cube.attrs["version"] = version
+    save_cube(cube)
+    sketch = merge_sketches([old_sketch, build_sketch(batch)])
+    sketch.attrs["version"] = version
+    save_sketch(sketch)
+    moments = merge_moments([old_moments, build_moments(batch)])
+    moments.attrs["version"] = version
+    save_moments(moments)
+    aqi_table = merge_aqi_tables([old_aqi, build_aqi_table(batch)])
+    aqi_table.attrs["version"] = version
+    save_aqi_table(aqi_table)
+    # describe() tidak bisa digabung (kuartil), dihitung ulang sekali untuk versi baru
+    save_summary(build_summary(_dataset(path, {"base_version": base_version, "version": version, "batches": batches})))
+
+    # Manifest ditulis terakhir: dashboard baru melihat versi baru setelah semua ringkasan siap
+    _write_manifest({**manifest, "version": version, "batches": batches})
+    return version
+
+
+def ingest_pending(source, drop_dir=DROP_DIR):
+    """
+    Ingest semua file CSV di ``drop_dir`` (urut nama). File yang berhasil dipindah
+    ke ``processed/``, file yang ditolak ke ``rejected/``.
+    """
+    drop_dir = Path(drop_dir)
+    versions = []
+    for csv_path in sorted(drop_dir.glob("*.csv")):
+        try:
+            version = ingest_file(source, csv_path)
+        except ValueError as e:
+            print(e)
+            target = drop_dir / "rejected"
+        else:
+            print(f"{csv_path.name}: " + (f"versi {version}" if version else "sudah pernah di-ingest"))
+            if version:
+                versions.append(version)
+            target = drop_dir / "processed"
+        target.mkdir(exist_ok=True)
+        shutil.move(str(csv_path), target / csv_path.name)
+    return versions
+
+
+def watch(source, drop_dir=DROP_DIR, interval=POLL_INTERVAL):
+    """
+    Pantau ``drop_dir`` terus-menerus. Penulis batch sebaiknya menulis ke nama
+    sementara (bukan .csv) lalu rename, agar file setengah jadi tidak terbaca.
+    """
+    while True:
+        ingest_pending(source, drop_dir)
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest batch CSV per jam dari folder drop")
+    parser.add_argument("source", help="file dataset dasar (.csv, .zip atau .parquet), mis. hasil `data_cache.py fetch`")
+    parser.add_argument("--drop", default=DROP_DIR, help=f"folder drop (default: {DROP_DIR})")
+    parser.add_argument("--watch", action="store_true", help="pantau folder drop terus-menerus")
+    parser.add_argument("--interval", type=int, default=POLL_INTERVAL)
+    args = parser.parse_args()
+
+    if args.watch:
+        watch(args.source, args.drop, args.interval)
+    else:
+        ingest_pending(args.source, args.drop)
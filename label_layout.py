@@ -0,0 +1,158 @@
+"""
+Tata letak label untuk bubble chart stasiun.
+
+``adjust_text`` menggeser label secara iteratif dan mendominasi waktu render.
+Posisi label di sini dihitung sekali per versi dataset lalu disimpan sebagai JSON
+di ``<CACHE_DIR>/labels/``, sehingga render berikutnya cukup menempatkan label
+di posisi yang tersimpan. Untuk jumlah stasiun yang besar (atau bila adjustText
+tidak tersedia) dipakai penempatan greedy satu kali jalan berbasis grid.
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from data_cache import CACHE_DIR
+from memo import BoundedCache, persistent, register
+
+LABEL_DIR = CACHE_DIR / "labels"
+ADJUST_TEXT_MAX = 40  # di atas jumlah label ini langsung pakai penempatan greedy
+ARROWPROPS = dict(arrowstyle="-", color="gray", lw=0.5)
+
+# Arah geser kandidat: di tengah titik dulu, lalu atas, bawah, kanan, kiri dan diagonal
+_DIRECTIONS = [(0, 0), (0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1)]
+
+_layouts = BoundedCache(maxsize=32, ttl=None)
+register("label_layout.place_labels", _layouts)
+
+
+def _label_path(key):
+    return LABEL_DIR / ("-".join(map(str, key)) + ".json")
+
+
+def _on_disk(key):
+    return all(persistent(part) for part in key)
+
+
+def _load(key, labels):
+    positions = _layouts.get(key)
+    if positions is None and _on_disk(key):
+        try:
+            with open(_label_path(key), encoding="utf-8") as f:
+                stored = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if stored["labels"] != list(labels):
+            return None
+        positions = np.array(stored["positions"], dtype=float)
+        _layouts.put(key, positions)
+    return positions
+
+
+def _save(key, labels, positions):
+    _layouts.put(key, positions)
+    if not _on_disk(key):
+        return
+    LABEL_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=LABEL_DIR, suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"labels": list(labels), "positions": positions.tolist()}, f)
+    os.replace(tmp, _label_path(key))
+
+
+def greedy_positions(ax, x, y, labels, fontsize=9, marker_size=600):
+    """
+    Penempatan label satu kali jalan: tiap label mencoba kandidat posisi di sekitar
+    titiknya dan memakai kandidat pertama yang tidak menabrak label yang sudah
+    ditempatkan (dicek lewat grid, jadi O(n)). Hasil dalam koordinat data.
+    """
+    ax.autoscale_view()
+    scale = ax.figure.dpi / 72
+    points = ax.transData.transform(np.column_stack([x, y]).astype(float))
+    widths = np.array([len(str(label)) for label in labels]) * fontsize * 0.6 * scale
+    height = fontsize * 1.3 * scale
+    radius = np.sqrt(marker_size) / 2 * scale
+
+    cell = max(height, float(np.median(widths)) if len(widths) else height)
+    grid = {}
+    boxes = []
+    centers = np.empty_like(points)
+
+    def cells(box):
+        x0, y0, x1, y1 = box
+        for i in range(int(x0 // cell), int(x1 // cell) + 1):
+            for j in range(int(y0 // cell), int(y1 // cell) + 1):
+                yield i, j
+
+    def overlaps(box):
+        seen = set()
+        for c in cells(box):
+            for other in grid.get(c, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                ox0, oy0, ox1, oy1 = boxes[other]
+                if box[0] < ox1 and ox0 < box[2] and box[1] < oy1 and oy0 < box[3]:
+                    yield other
+
+    for i in np.lexsort((points[:, 0], points[:, 1])):
+        w = widths[i]
+        best, best_cost = None, None
+        for dx, dy in _DIRECTIONS:
+            cx = points[i, 0] + dx * (radius + w / 2)
+            cy = points[i, 1] + dy * (radius + height / 2)
+            box = (cx - w / 2, cy - height / 2, cx + w / 2, cy + height / 2)
+            cost = sum(1 for _ in overlaps(box))
+            if best_cost is None or cost < best_cost:
+                best, best_cost = (cx, cy, box), cost
+            if cost == 0:
+                break
+        cx, cy, box = best
+        centers[i] = cx, cy
+        boxes.append(box)
+        for c in cells(box):
+            grid.setdefault(c, []).append(len(boxes) - 1)
+
+    return ax.transData.inverted().transform(centers)
+
+
+def _adjust_text_positions(ax, x, y, labels, fontsize):
+    from adjustText import adjust_text
+
+    texts = [ax.text(xi, yi, label, fontsize=fontsize, ha="center", va="center") for xi, yi, label in zip(x, y, labels)]
+    adjust_text(texts, ax=ax)
+    positions = np.array([t.get_position() for t in texts], dtype=float)
+    for t in texts:
+        t.remove()
+    return positions
+
+
+def compute_positions(ax, x, y, labels, fontsize=9, marker_size=600):
+    if len(labels) <= ADJUST_TEXT_MAX:
+        try:
+            return _adjust_text_positions(ax, x, y, labels, fontsize)
+        except ImportError:
+            pass
+    return greedy_positions(ax, x, y, labels, fontsize, marker_size)
+
+
+def place_labels(ax, x, y, labels, key=None, fontsize=9, marker_size=600):
+    """
+    Gambar label di ``ax``. Posisi diambil dari cache ``key`` (tuple, mis. nama view
+    dan versi dataset) bila ada, selain itu dihitung lalu disimpan. Key yang
+    memuat None (dataset tanpa versi) tidak di-cache; key potongan rentang waktu
+    hanya di-cache di memori.
+    """
+    x, y, labels = np.asarray(x, dtype=float), np.asarray(y, dtype=float), [str(label) for label in labels]
+    cacheable = key is not None and None not in key
+    positions = _load(key, labels) if cacheable else None
+    if positions is None:
+        positions = compute_positions(ax, x, y, labels, fontsize, marker_size)
+        if cacheable:
+            _save(key, labels, positions)
+
+    for xi, yi, label, (lx, ly) in zip(x, y, labels, positions):
+        moved = not np.isclose([lx, ly], [xi, yi]).all()
+        ax.annotate(label, xy=(xi, yi), xytext=(lx, ly), textcoords="data", fontsize=fontsize,
+                    ha="center", va="center", color="black", arrowprops=ARROWPROPS if moved else None)
@@ -0,0 +1,215 @@
+"""
+Memoization untuk fungsi agregasi, dipakai bersama oleh semua sesi Streamlit.
+
+Kunci cache = versi dataset (``df.attrs["version"]``) + argumen lain, sehingga hasil
+untuk dataset dan argumen yang sama (mis. stasiun yang dipilih) langsung diambil dari
+memori. Ukuran cache dibatasi (LRU) dan tiap entri punya TTL, serta tersedia
+hitungan hit/miss per fungsi. Hasil yang dikembalikan dipakai bersama antar sesi,
+jadi jangan diubah in-place oleh pemanggil.
+
+Artefak turunan per versi dataset yang juga disimpan di disk (cube, sketch, akumulator
+korelasi, ringkasan) memakai ``PersistedArtifact``. Artefak potongan rentang waktu
+(versi berisi ``WINDOW_MARK``) hanya disimpan di memori, lihat ``persistent``.
+"""
+import functools
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from profiling import span
+
+DEFAULT_MAXSIZE = 128
+DEFAULT_TTL = 60 * 60  # detik, None = tidak kedaluwarsa
+WINDOW_MARK = "@"  # versi potongan waktu: "<versi dataset>@<rentang>" (dataset.select_time)
+
+_registry = {}
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+class BoundedCache:
+    """
+    Cache LRU thread-safe dengan batas jumlah entri, TTL dan hitungan hit/miss.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or now - entry[0] < self.ttl):
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[1]
+            self._stats["misses"] += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def count_miss(self):
+        with self._lock:
+            self._stats["misses"] += 1
+
+    def info(self):
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "maxsize": self.maxsize, "ttl": self.ttl}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def persistent(version):
+    """
+    Apakah artefak versi ``version`` boleh disimpan di disk. Potongan rentang waktu
+    jumlahnya tak terbatas (mengikuti rentang yang dipilih pengguna), jadi artefaknya
+    hanya disimpan di cache memori yang dibatasi LRU.
+    """
+    return version is not None and WINDOW_MARK not in str(version)
+
+
+def register(name, cache):
+    """
+    Daftarkan cache agar statistiknya muncul di ``memo_stats()``.
+    """
+    _registry[name] = cache
+
+
+def _key_part(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)) or isinstance(getattr(value, "attrs", None), dict):
+        version = value.attrs.get("version")
+        if version is None:
+            raise _Uncacheable
+        return ("frame", version)
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _key_part(v)) for k, v in value.items()))
+    hash(value)
+    return value
+
+
+def memoize(maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, phase="aggregate"):
+    """
+    Dekorator memoization dengan batas jumlah entri (LRU) dan TTL.
+
+    DataFrame tanpa ``attrs["version"]`` tidak di-cache (fungsi langsung dipanggil).
+    Pemanggilan yang tidak kena cache diukur sebagai span ``phase`` (lihat ``profiling``).
+    """
+    def decorator(fn):
+        cache = BoundedCache(maxsize, ttl)
+        missing = object()
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                key = (_key_part(args), _key_part(kwargs))
+            except (_Uncacheable, TypeError):
+                cache.count_miss()
+                with span(phase, fn.__qualname__):
+                    return fn(*args, **kwargs)
+
+            value = cache.get(key, missing)
+            if value is missing:
+                with span(phase, fn.__qualname__):
+                    value = fn(*args, **kwargs)
+                cache.put(key, value)
+            return value
+
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        register(f"{fn.__module__}.{fn.__qualname__}", cache)
+        return wrapper
+
+    return decorator
+
+
+class PersistedArtifact:
+    """
+    Artefak per versi dataset (frame) di memori dan di ``<directory>/<filename>``.
+
+    ``get(df, *args)`` mengambil artefak versi ``df.attrs["version"]`` dari memori, dari
+    disk, atau membangunnya sekali dengan ``build(df, *args)`` lalu menyimpannya.
+    ``save`` menulis ke file sementara lalu ``os.replace``, sehingga proses lain tidak
+    pernah membaca file setengah jadi. Versi yang tidak ``persistent`` hanya disimpan
+    di memori. ``kind`` dipakai untuk nama span.
+    """
+
+    def __init__(self, name, kind, directory, build, filename=None, attrs=None, maxsize=4):
+        self.kind = kind
+        self.directory = directory
+        self.build = build
+        self.filename = filename or (lambda version: f"{version}.parquet")
+        self.attrs = {"sorted_by": "station"} if attrs is None else attrs
+        self.cache = BoundedCache(maxsize, ttl=None)
+        self._lock = threading.Lock()
+        register(name, self.cache)
+
+    def path(self, version, *args):
+        return self.directory / self.filename(version, *args)
+
+    def save(self, frame, *args):
+        """
+        Simpan ``frame`` untuk versi ``frame.attrs["version"]`` ke disk dan ke memori.
+        """
+        version = frame.attrs["version"]
+        self.cache.put((version, *args), frame)
+        if not persistent(version):
+            return None
+        path = self.path(version, *args)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=path.suffix)
+        os.close(fd)
+        try:
+            frame.to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return path
+
+    def get(self, df, *args):
+        version = df.attrs.get("version")
+        if version is None:
+            return self.build(df, *args)
+
+        key = (version, *args)
+        with self._lock:
+            frame = self.cache.get(key)
+            if frame is None:
+                path = self.path(version, *args) if persistent(version) else None
+                if path is not None and path.exists():
+                    with span("load", self.kind):
+                        frame = pd.read_parquet(path)
+                    frame.attrs = {"version": version, **self.attrs}
+                    self.cache.put(key, frame)
+                else:
+                    with span("aggregate", f"build_{self.kind}"):
+                        frame = self.build(df, *args)
+                    self.save(frame, *args)
+            return frame
+
+
+def memo_stats():
+    """
+    Statistik hit/miss semua fungsi yang di-memoize.
+    """
+    return {name: cache.info() for name, cache in _registry.items()}
@@ -0,0 +1,281 @@
+"""
+Pengukuran waktu per rerun dashboard.
+
+Kode di jalur load dan di tiap view membungkus pekerjaannya dengan ``span(fase, nama)``.
+Fase: ``load`` (unduh, baca file), ``aggregate`` (groupby/cube/memo miss),
+``render`` (matplotlib, folium) dan ``serialize`` (PNG, HTML peta). Span boleh
+bersarang; waktu tiap fase dihitung dari self-time (durasi dikurangi span anak),
+sehingga total per fase tidak dobel. Sisa waktu view (mis. kirim data ke browser)
+masuk ke fase ``view``.
+
+Pengukuran hanya aktif bila ``AQ_DEBUG=1`` (semua sesi) atau ``AQ_DEBUG=query`` dan URL
+memuat ``?debug=1`` (hanya sesi itu); tanpa ``AQ_DEBUG`` parameter URL diabaikan, jadi
+pengunjung app yang di-deploy tidak bisa menyalakannya, dan ``span`` tidak melakukan
+apa-apa. Saat aktif, span ditulis sebagai JSON lines ke ``AQ_TRACE_FILE`` (default
+``<CACHE_DIR>/trace.jsonl``, dirotasi di atas ``AQ_TRACE_MAX_BYTES``) dan ditampilkan di
+panel debug sidebar, yang juga bisa merekam profil cProfile (atau pyinstrument bila
+``AQ_PROFILER=pyinstrument``) untuk satu rerun (tombol, atau ``?profile=1`` yang dihapus
+dari URL setelah dipakai). Hanya ``PROFILE_KEEP`` profil terbaru yang disimpan.
+
+Modul ini sengaja tidak mengimpor modul proyek lain di level modul karena dipakai
+oleh ``memo`` dan ``data_cache``.
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+PHASES = ("load", "aggregate", "render", "serialize", "view")
+PROFILER = os.environ.get("AQ_PROFILER", "cprofile")
+PROFILE_TOP = 25  # jumlah fungsi teratas yang ditampilkan dari profil cProfile
+PROFILE_KEEP = 20  # jumlah file profil terbaru yang disimpan di profile_dir()
+TRACE_MAX_BYTES = int(os.environ.get("AQ_TRACE_MAX_BYTES", 50 * 2**20))  # di atas ini trace.jsonl dirotasi
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def _debug_mode():
+    """
+    ``None`` (mati), ``"all"`` (AQ_DEBUG=1, semua sesi) atau ``"query"`` (hanya sesi
+    dengan ``?debug=1``).
+    """
+    value = os.environ.get("AQ_DEBUG", "")
+    if value in ("", "0"):
+        return None
+    return "query" if value == "query" else "all"
+
+
+def trace_file():
+    from data_cache import CACHE_DIR
+
+    return Path(os.environ.get("AQ_TRACE_FILE", CACHE_DIR / "trace.jsonl"))
+
+
+def profile_dir():
+    from data_cache import CACHE_DIR
+
+    return CACHE_DIR / "profiles"
+
+
+class Trace:
+    """
+    Span satu rerun (per thread, yaitu per sesi Streamlit).
+    """
+
+    def __init__(self, profile=False):
+        self.rerun_id = uuid.uuid4().hex[:12]
+        self.started = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self.spans = []
+        self.stack = []
+        self.origin = time.perf_counter()
+        self.seconds = None
+        self.view = None
+        self.profile_path = None
+        self.profile_text = None
+        self._profiler = _start_profiler() if profile else None
+
+    def totals(self):
+        """
+        Self-time per fase (detik).
+        """
+        totals = dict.fromkeys(PHASES, 0.0)
+        for s in self.spans:
+            totals[s["phase"]] = totals.get(s["phase"], 0.0) + s["self_seconds"]
+        if self.seconds is not None:
+            totals["other"] = max(self.seconds - sum(totals.values()), 0.0)  # di luar span
+        return totals
+
+
+def _start_profiler():
+    if PROFILER == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            pass
+        else:
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _stop_profiler(trace):
+    profiler = trace._profiler
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        trace.profile_path = directory / f"{trace.rerun_id}.prof"
+        profiler.dump_stats(trace.profile_path)
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        trace.profile_text = out.getvalue()
+    else:
+        profiler.stop()
+        trace.profile_path = directory / f"{trace.rerun_id}.html"
+        trace.profile_path.write_text(profiler.output_html(), encoding="utf-8")
+        trace.profile_text = profiler.output_text()
+    _prune_profiles(directory)
+
+
+def _prune_profiles(directory, keep=PROFILE_KEEP):
+    """
+    Hapus profil lama, sisakan ``keep`` file terbaru.
+    """
+    profiles = sorted(directory.glob("*.*"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in profiles[keep:]:
+        path.unlink(missing_ok=True)
+
+
+def _rotate(path, max_bytes=TRACE_MAX_BYTES):
+    """
+    Pindahkan ``path`` ke ``<path>.1`` (menimpa rotasi sebelumnya) bila sudah melebihi
+    ``max_bytes``, sehingga file trace paling besar kira-kira dua kali ``max_bytes``.
+    """
+    try:
+        if path.stat().st_size >= max_bytes:
+            os.replace(path, path.with_name(path.name + ".1"))
+    except FileNotFoundError:
+        pass
+
+
+def current():
+    return getattr(_local, "trace", None)
+
+
+def start_rerun(enabled=None, profile=None):
+    """
+    Mulai pengukuran rerun ini; dipanggil di awal script dashboard. Mengembalikan
+    None bila pengukuran tidak aktif. ``?profile=1`` hanya berlaku untuk satu rerun,
+    sama seperti tombol di panel debug.
+    """
+    import streamlit as st
+
+    mode = _debug_mode()
+    if enabled is None:
+        enabled = mode == "all" or (mode == "query" and st.query_params.get("debug") == "1")
+    if profile is None:
+        profile = st.session_state.pop("aq_profile_next", False)
+        if enabled and st.query_params.get("profile") == "1":
+            del st.query_params["profile"]
+            profile = True
+    _local.trace = Trace(profile=profile) if enabled else None
+    return _local.trace
+
+
+@contextmanager
+def span(phase, name=None):
+    """
+    Ukur blok kode sebagai fase ``phase`` (lihat PHASES) dengan label ``name``.
+    """
+    trace = current()
+    if trace is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    record = {"phase": phase, "name": name, "view": trace.view, "depth": len(trace.stack),
+              "offset": start - trace.origin, "child_seconds": 0.0}
+    trace.stack.append(record)
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        trace.stack.pop()
+        if trace.stack:
+            trace.stack[-1]["child_seconds"] += seconds
+        record["seconds"] = seconds
+        record["self_seconds"] = max(seconds - record.pop("child_seconds"), 0.0)
+        trace.spans.append(record)
+
+
+def view(fn):
+    """
+    Dekorator untuk fungsi view dashboard: semua span di dalamnya diberi label view ini.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        trace = current()
+        if trace is None:
+            return fn(*args, **kwargs)
+        previous, trace.view = trace.view, fn.__name__
+        try:
+            with span("view", fn.__name__):
+                return fn(*args, **kwargs)
+        finally:
+            trace.view = previous
+
+    return wrapper
+
+
+def finish_rerun():
+    """
+    Tutup pengukuran rerun ini, tulis span ke file JSON lines, dan kembalikan Trace-nya.
+    """
+    trace = current()
+    _local.trace = None
+    if trace is None:
+        return None
+    trace.seconds = time.perf_counter() - trace.origin
+    if trace._profiler is not None:
+        _stop_profiler(trace)
+
+    path = trace_file()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    trace.spans.sort(key=lambda s: s["offset"])
+    lines = [json.dumps({"rerun": trace.rerun_id, "started": trace.started, "view": s["view"] or "page",
+                         "phase": s["phase"], "name": s["name"], "depth": s["depth"], "offset": round(s["offset"], 6),
+                         "seconds": round(s["seconds"], 6), "self_seconds": round(s["self_seconds"], 6)})
+             for s in trace.spans]
+    lines.append(json.dumps({"rerun": trace.rerun_id, "started": trace.started, "view": None, "phase": "total",
+                             "name": None, "depth": -1, "offset": 0.0, "seconds": round(trace.seconds, 6),
+                             "self_seconds": None}))
+    with _write_lock:
+        _rotate(path)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+    return trace
+
+
+def debug_panel(trace):
+    """
+    Panel debug di sidebar: waktu per fase dan per view untuk rerun ini, statistik
+    cache memo, dan tombol untuk merekam profil rerun berikutnya.
+    """
+    if trace is None:
+        return
+    import pandas as pd
+    import streamlit as st
+
+    from memo import memo_stats
+
+    with st.sidebar.expander("Debug: waktu rerun", expanded=True):
+        totals = trace.totals()
+        st.write(f"Total {trace.seconds:.3f} s (rerun `{trace.rerun_id}`)")
+        st.dataframe(pd.Series(totals, name="detik").round(4))
+
+        spans = pd.DataFrame(trace.spans, columns=["view", "phase", "name", "depth", "offset", "seconds", "self_seconds"])
+        if not spans.empty:
+            spans["view"] = spans["view"].fillna("page")
+            st.dataframe(spans.pivot_table(index="view", columns="phase", values="self_seconds", aggfunc="sum").round(4))
+            st.dataframe(spans.round(4))
+
+        st.caption("Cache memo")
+        st.dataframe(pd.DataFrame(memo_stats()).T)
+
+        st.button("Profil rerun berikutnya", on_click=lambda: st.session_state.update(aq_profile_next=True))
+        if trace.profile_path is not None:
+            st.text(trace.profile_text)
+            st.download_button("Unduh profil", trace.profile_path.read_bytes(), file_name=trace.profile_path.name)
+        st.caption(f"Span tersimpan di {trace_file()}")
@@ -0,0 +1,166 @@
+"""
+Sketch kuantil per (station, year, month) untuk median dan persentil (p90, p99).
+
+Median dan persentil tidak bisa diambil dari cube (sum/count/min/max) dan kuantil
+eksak butuh mengurutkan semua data per grup, yang tidak bisa digabung bertahap.
+Di sini tiap nilai dipetakan ke bucket logaritmik (seperti DDSketch): bucket ``k``
+berisi nilai di ``[MIN_VALUE * GAMMA**(k-1), MIN_VALUE * GAMMA**k)`` (tanda ``k`` ikut
+tanda nilai, |nilai| < MIN_VALUE masuk bucket 0), sehingga kuantil yang dijawab
+dari sketch punya galat relatif paling besar ``RELATIVE_ACCURACY``.
+
+Sketch disimpan sebagai frame (station, year, month, column, key, count). Ukurannya
+dibatasi jumlah bucket yang terisi, bukan jumlah baris, dan dua sketch digabung
+cukup dengan menjumlahkan count per bucket (``merge_sketches``). Karena itu sketch
+bisa dibangun per batch Parquet (out-of-core) dan diperbarui saat ingest tanpa
+memindai ulang riwayat, sama seperti cube.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from cube import BATCH_ROWS, ENGINE, IN_MEMORY_ROWS, MERGE_EVERY
+from data_cache import CACHE_DIR
+from dataset import concat_frames, select_station
+from memo import PersistedArtifact, memoize
+
+SKETCH_COLUMNS = ["PM2.5", "PM10", "SO2", "NO2", "CO", "O3"]
+KEYS = ["station", "year", "month", "column", "key"]
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+MIN_VALUE = 0.01  # nilai dengan |x| lebih kecil dianggap 0
+
+
+def bucket_keys(values):
+    """
+    Nomor bucket (int16) untuk array nilai tanpa NaN.
+    """
+    magnitude = np.abs(values)
+    keys = np.zeros(len(values), dtype="int16")
+    large = magnitude >= MIN_VALUE
+    index = np.floor(np.log(magnitude[large] / MIN_VALUE) / np.log(GAMMA)) + 1
+    keys[large] = (np.sign(values[large]) * index).astype("int16")
+    return keys
+
+
+def bucket_values(keys):
+    """
+    Nilai wakil tiap bucket, berjarak paling jauh ``RELATIVE_ACCURACY`` (relatif)
+    dari semua nilai di bucket itu.
+    """
+    keys = np.asarray(keys, dtype="float64")
+    upper = MIN_VALUE * GAMMA ** np.abs(keys)
+    return np.where(keys == 0, 0.0, np.sign(keys) * upper * 2 / (1 + GAMMA))
+
+
+def build_sketch(df, columns=SKETCH_COLUMNS):
+    """
+    Sketch dari data per jam: jumlah nilai per (station, year, month, column, key).
+    """
+    parts = []
+    for col in columns:
+        values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+        valid = ~np.isnan(values)
+        part = pd.DataFrame({
+            "station": df["station"][valid],
+            "year": df["year"].to_numpy()[valid],
+            "month": df["month"].to_numpy()[valid],
+            "key": bucket_keys(values[valid]),
+        })
+        counts = part.groupby(["station", "year", "month", "key"], observed=True, sort=False).size()
+        counts = counts.astype("int32").rename("count").reset_index()
+        counts.insert(3, "column", pd.Categorical([col] * len(counts), categories=SKETCH_COLUMNS))
+        parts.append(counts)
+    return _sorted(concat_frames(parts), df.attrs.get("version"))
+
+
+def _sorted(sketch, version=None):
+    sketch = sketch.sort_values(KEYS, kind="stable", ignore_index=True)
+    sketch.attrs = {"version": version, "sorted_by": "station"}
+    return sketch
+
+
+def merge_sketches(sketches):
+    """
+    Gabungkan beberapa sketch (mis. sketch lama dan sketch batch data baru).
+    """
+    combined = concat_frames(sketches)
+    merged = combined.groupby(KEYS, observed=True, sort=False)["count"].sum().astype("int32").reset_index()
+    return _sorted(merged)
+
+
+def build_sketch_chunked(files, batch_rows=BATCH_ROWS):
+    """
+    Sketch dari file Parquet yang dibaca per batch; sketch parsial digabung
+    dengan ``merge_sketches``.
+    """
+    columns = ["station", "year", "month", *SKETCH_COLUMNS]
+    parts = []
+    for path in files:
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            parts.append(build_sketch(batch.to_pandas()))
+            if len(parts) >= MERGE_EVERY:
+                parts = [merge_sketches(parts)]
+    return merge_sketches(parts)
+
+
+def _build(df):
+    files = getattr(df, "files", None)
+    if files is None or ENGINE == "pandas" or (ENGINE == "auto" and len(df) <= IN_MEMORY_ROWS):
+        sketch = build_sketch(df)
+    else:
+        sketch = build_sketch_chunked(files)
+    sketch.attrs["version"] = df.attrs.get("version")
+    return sketch
+
+
+_sketches = PersistedArtifact("sketch.get_sketch", "sketch", CACHE_DIR / "sketches", _build)
+
+
+def sketch_path(version):
+    return _sketches.path(version)
+
+
+def save_sketch(sketch):
+    """
+    Simpan sketch ke disk (atomik) dan ke memori untuk versi ``sketch.attrs["version"]``.
+    """
+    return _sketches.save(sketch)
+
+
+def get_sketch(df):
+    """
+    Ambil sketch untuk versi dataset ``df.attrs["version"]``: dari memori, dari disk,
+    atau dibangun sekali lalu disimpan.
+    """
+    return _sketches.get(df)
+
+
+def quantile_name(q):
+    return "median" if q == 0.5 else f"p{q * 100:g}"
+
+
+@memoize()
+def quantiles(sketch, by, columns=SKETCH_COLUMNS, qs=(0.5, 0.9, 0.99), station=None):
+    """
+    Kuantil ``qs`` tiap kolom per ``by`` (opsional hanya untuk satu ``station``), dengan
+    kolom ``<kolom>_median`` / ``<kolom>_p90`` dst. dan index = ``by``.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    if station is not None:
+        sketch = select_station(sketch, station)
+    sketch = sketch[sketch["column"].isin(columns)]
+    counts = sketch.groupby([*by, "column", "key"], observed=True, sort=True)["count"].sum().reset_index()
+
+    groups = [*by, "column"]
+    grouped = counts.groupby(groups, observed=True, sort=False)["count"]
+    cumulative = grouped.cumsum().to_numpy()
+    total = grouped.transform("sum").to_numpy()
+
+    result = []
+    for q in qs:
+        # Bucket pertama yang memuat nilai ke-(q * (n - 1)) (urutan dari 0)
+        hit = counts[cumulative > q * (total - 1)]
+        keys = hit.groupby(groups, observed=True, sort=True)["key"].first()
+        values = pd.Series(bucket_values(keys.to_numpy()), index=keys.index).unstack("column")
+        result.append(values.reindex(columns=list(columns)).add_suffix(f"_{quantile_name(q)}"))
+    return pd.concat(result, axis=1)
@@ -0,0 +1,172 @@
+"""
+Peta stasiun interaktif.
+
+Warna dan ukuran marker mengikuti kategori rata-rata AQI per jam tiap stasiun (lihat
+``aqi.py``) dan ditentukan sekaligus untuk semua stasiun, lalu marker dikirim sebagai
+satu layer GeoJSON (atau FastMarkerCluster bila stasiunnya banyak), bukan satu
+``CircleMarker`` per stasiun. HTML peta di-cache per versi dataset (dan versi file
+koordinat) di memori dan di ``<CACHE_DIR>/maps/``, sehingga rerun (dan server yang
+baru start) tidak perlu membangun dan menserialisasi ulang peta.
+
+Koordinat stasiun dibaca dari file CSV ``station,lat,lon`` (``stations.csv`` di repo,
+bisa diganti lewat ``AQ_STATIONS_FILE``), jadi stasiun baru cukup ditambahkan ke file
+itu. Stasiun di dataset yang tidak punya koordinat tidak tampil di peta; daftarnya
+diberikan ``missing_locations`` agar dashboard bisa memberi peringatan.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+import folium
+import numpy as np
+import pandas as pd
+from folium.plugins import FastMarkerCluster
+
+from aqi import CATEGORIES, CATEGORY_COLORS, aqi_summary, category_codes
+from cube import get_cube, means
+from data_cache import CACHE_DIR, content_version
+from memo import memoize, persistent
+from profiling import span
+
+DEFAULT_STATIONS_FILE = Path(__file__).resolve().with_name("stations.csv")  # 12 stasiun dataset Beijing
+STATIONS_FILE = Path(os.environ.get("AQ_STATIONS_FILE", DEFAULT_STATIONS_FILE))
+MAP_CENTER = [39.9042, 116.4074]
+MAP_DIR = CACHE_DIR / "maps"
+
+# Warna dan ukuran marker per kategori AQI (Baik ... Berbahaya)
+CATEGORY_SIZES = np.array([5, 8, 11, 14, 17, 20])
+NO_DATA_COLOR, NO_DATA_SIZE = "gray", 5
+
+CLUSTER_THRESHOLD = 200  # di atas jumlah stasiun ini marker dikelompokkan
+
+_CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]),
+        {radius: row[3], color: row[2], fill: true, fillColor: row[2], fillOpacity: 0.7});
+    marker.bindTooltip(row[4]);
+    marker.bindPopup(row[5]);
+    return marker;
+}
+"""
+
+
+@memoize(maxsize=4, phase="load")
+def _read_locations(path, version):
+    locations = pd.read_csv(path, dtype={"station": str, "lat": "float64", "lon": "float64"})
+    locations = locations.dropna(subset=["lat", "lon"]).drop_duplicates("station").set_index("station")
+    locations.attrs = {"version": version}
+    return locations
+
+
+def station_locations(path=None):
+    """
+    Koordinat (lat, lon) per stasiun dari file CSV ``path`` (default STATIONS_FILE).
+    Versi frame = checksum file, sehingga peta dibangun ulang bila file berubah.
+    """
+    path = Path(path or STATIONS_FILE)
+    return _read_locations(str(path), content_version(path))
+
+
+def missing_locations(df, locations):
+    """
+    Stasiun di ``df`` yang tidak punya koordinat di ``locations`` (tidak tampil di peta).
+    """
+    stations = means(get_cube(df), "station", ["PM2.5", "TEMP"]).index.astype(str)
+    return sorted(set(stations) - set(locations.index))
+
+
+def _fmt(values, suffix=""):
+    text = pd.Series(values).map("{:.2f}".format) + suffix
+    return text.where(pd.Series(values).notna(), "No Data").to_numpy()
+
+
+def marker_table(station_means, locations):
+    """
+    Tabel marker (lat, lon, warna, ukuran, tooltip, popup) untuk semua stasiun
+    yang punya koordinat, dihitung secara vektor.
+    """
+    table = locations.join(station_means[["AQI", "primary", *CATEGORIES, "PM2.5", "TEMP"]], how="left")
+
+    codes = category_codes(table["AQI"])
+    missing = codes < 0
+    table["color"] = np.where(missing, NO_DATA_COLOR, np.array(CATEGORY_COLORS)[codes])
+    table["size"] = np.where(missing, NO_DATA_SIZE, CATEGORY_SIZES[codes])
+
+    names = table.index.to_numpy(dtype=str).astype(object)
+    category_text = np.where(missing, "No Data", np.array(CATEGORIES)[codes]).astype(object)
+    primary_text = table["primary"].astype(object).fillna("-").to_numpy()
+    aqi_text = _fmt(table["AQI"])
+    hours = table[CATEGORIES].to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        polluted_text = _fmt(hours[:, 2:].sum(axis=1) / hours.sum(axis=1) * 100, "%")
+    pm25_text = _fmt(table["PM2.5"])
+    temp_text = _fmt(table["TEMP"], "°C")
+    table["tooltip"] = names + " (AQI: " + aqi_text + ", " + category_text + ")"
+    table["popup"] = ("<b>" + names + "</b><br>Mean AQI: " + aqi_text + " (" + category_text + ")"
+                      + "<br>Polutan utama: " + primary_text + "<br>Jam AQI > 100: " + polluted_text
+                      + "<br>Mean PM2.5: " + pm25_text + "<br>Mean TEMP: " + temp_text)
+    return table
+
+
+def build_map(table):
+    m = folium.Map(location=MAP_CENTER, zoom_start=10)
+    columns = ["lat", "lon", "color", "size", "tooltip", "popup"]
+
+    if len(table) > CLUSTER_THRESHOLD:
+        FastMarkerCluster(table[columns].to_numpy().tolist(), callback=_CLUSTER_CALLBACK).add_to(m)
+        return m
+
+    lon, lat = table["lon"].to_numpy().tolist(), table["lat"].to_numpy().tolist()
+    properties = table[["color", "size", "tooltip", "popup"]].to_dict("records")
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [x, y]}, "properties": props}
+            for x, y, props in zip(lon, lat, properties)
+        ],
+    }
+    folium.GeoJson(
+        geojson,
+        marker=folium.CircleMarker(fill=True, fill_opacity=0.7),
+        style_function=lambda feature: {
+            "color": feature["properties"]["color"],
+            "fillColor": feature["properties"]["color"],
+            "radius": feature["properties"]["size"],
+        },
+        tooltip=folium.GeoJsonTooltip(fields=["tooltip"], labels=False),
+        popup=folium.GeoJsonPopup(fields=["popup"], labels=False),
+    ).add_to(m)
+    return m
+
+
+def map_path(version, locations=None):
+    locations = station_locations() if locations is None else locations
+    return MAP_DIR / f"{version}-{locations.attrs['version']}-aqi.html"
+
+
+@memoize(maxsize=8, ttl=None)
+def map_html(df, locations):
+    """
+    HTML lengkap peta AQI (serta rata-rata PM2.5 dan TEMP) per stasiun untuk versi dataset ``df``
+    dengan koordinat ``locations`` (lihat ``station_locations``), dibaca dari disk bila sudah
+    pernah dibuat.
+    """
+    version = df.attrs.get("version")
+    path = map_path(version, locations) if persistent(version) else None
+    if path is not None and path.exists():
+        with span("load", "map"):
+            return path.read_text(encoding="utf-8")
+
+    station_means = aqi_summary(df).join(means(get_cube(df), "station", ["PM2.5", "TEMP"]))
+    with span("render", "map"):
+        m = build_map(marker_table(station_means, locations))
+    with span("serialize", "map"):
+        html = m.get_root().render()
+
+    if path is not None:
+        MAP_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=MAP_DIR, suffix=".html")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp, path)
+    return html
@@ -0,0 +1,87 @@
+"""
+Statistik deskriptif (``describe``) yang dihitung sekali per versi dataset.
+
+Tabel "Statistik Deskriptif" dan statistik per stasiun sebelumnya memanggil
+``df.describe()`` pada seluruh data (atau satu stasiun) setiap kali dibuka. Di sini
+count, mean, std, min, kuartil dan max tiap kolom numerik dihitung sekali untuk
+seluruh data dan per stasiun, lalu disimpan di samping dataset sebagai
+``<CACHE_DIR>/summaries/<versi>.parquet``; dashboard cukup mengambil barisnya.
+
+Kuartil eksak tidak bisa digabung bertahap, jadi ringkasan dihitung ulang per versi
+(saat dataset pertama dibuka, saat ``warm.py`` dan saat ingest), satu kolom per
+langkah langsung dari file Parquet sehingga memori tetap sebanding satu kolom.
+"""
+import pandas as pd
+
+from data_cache import CACHE_DIR
+from dataset import CALENDAR_COLUMNS, NUMERIC_COLUMNS, concat_frames
+from memo import PersistedArtifact
+
+SUMMARY_COLUMNS = ["No", *CALENDAR_COLUMNS, *NUMERIC_COLUMNS]
+ALL_STATIONS = ""  # nilai kolom station untuk ringkasan seluruh data
+
+
+def _read(df, columns):
+    """
+    Kolom ``columns`` seluruh dataset; dataset Parquet dibaca langsung dari file
+    tanpa menyimpan kolomnya di ``LazyDataset``.
+    """
+    files = getattr(df, "files", None)
+    if files is None:
+        return df[columns]
+    frames = [pd.read_parquet(path, engine="pyarrow", columns=columns) for path in files]
+    return frames[0] if len(frames) == 1 else concat_frames(frames)
+
+
+def build_summary(df):
+    """
+    Hasil ``describe()`` seluruh data dan tiap stasiun dalam satu frame panjang:
+    kolom ``station`` (ALL_STATIONS untuk seluruh data), ``stat`` lalu satu kolom
+    per kolom numerik.
+    """
+    columns = [col for col in SUMMARY_COLUMNS if col in df.columns]
+    overall, per_station = {}, {}
+    for col in columns:
+        frame = _read(df, ["station", col])
+        overall[col] = frame[col].describe()
+        per_station[col] = frame.groupby("station", observed=True)[col].describe().stack()
+
+    overall = pd.DataFrame(overall)
+    overall.index = pd.MultiIndex.from_product([[ALL_STATIONS], overall.index])
+    per_station = pd.DataFrame(per_station)
+    per_station.index = per_station.index.set_levels(per_station.index.levels[0].astype(str), level=0)
+    summary = pd.concat([overall, per_station]).astype("float64").rename_axis(["station", "stat"]).reset_index()
+    summary.attrs = {"version": df.attrs.get("version")}
+    return summary
+
+
+_summaries = PersistedArtifact("summary.get_summary", "summary", CACHE_DIR / "summaries", build_summary, attrs={})
+
+
+def summary_path(version):
+    return _summaries.path(version)
+
+
+def save_summary(summary):
+    """
+    Simpan ringkasan ke disk (atomik) dan ke memori untuk versi ``summary.attrs["version"]``.
+    """
+    return _summaries.save(summary)
+
+
+def get_summary(df):
+    """
+    Ringkasan untuk versi dataset ``df.attrs["version"]``: dari memori, dari disk,
+    atau dihitung sekali lalu disimpan.
+    """
+    return _summaries.get(df)
+
+
+def lookup(summary, station=None, exclude=()):
+    """
+    Tabel seperti ``df.describe()`` (index count ... max) untuk seluruh data atau
+    satu stasiun.
+    """
+    rows = summary[summary["station"] == (ALL_STATIONS if station is None else str(station))]
+    table = rows.drop(columns="station").set_index("stat").rename_axis(None)
+    return table[[col for col in table.columns if col not in exclude]]
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Modul dashboard ada di root repo (tanpa paket)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dataset import COLUMNS, NUMERIC_COLUMNS, WIND_DIRECTIONS
+
+
+def hourly_frame(stations=("Dongsi", "Tiantan"), start="2013-03-01", hours=24 * 40, seed=0):
+    """
+    Data per jam sintetis dengan kolom dataset asli: ``hours`` jam berturut-turut per
+    stasiun, nilai acak dengan sebagian NaN.
+    """
+    rng = np.random.default_rng(seed)
+    time = pd.date_range(start, periods=hours, freq="h")
+    frames = []
+    for station in stations:
+        frame = pd.DataFrame({
+            "year": time.year, "month": time.month, "day": time.day, "hour": time.hour,
+            **{col: rng.gamma(2.0, 40.0, hours) for col in NUMERIC_COLUMNS},
+            "wd": rng.choice(WIND_DIRECTIONS, hours),
+            "station": station,
+        })
+        for col in NUMERIC_COLUMNS:
+            frame.loc[rng.random(hours) < 0.05, col] = np.nan
+        frames.append(frame)
+    df = pd.concat(frames, ignore_index=True)
+    df.insert(0, "No", np.arange(1, len(df) + 1))
+    return df[COLUMNS]
+
+
+@pytest.fixture
+def dataset_csv(tmp_path):
+    """
+    File CSV dataset sintetis (dua stasiun, 40 hari).
+    """
+    path = tmp_path / "air_quality_all.csv"
+    hourly_frame().to_csv(path, index=False)
+    return path
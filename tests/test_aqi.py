@@ -0,0 +1,61 @@
+"""
+AQI HJ 633-2012 (``aqi``): sub-indeks di breakpoint dan di antaranya, kategori,
+polutan utama dan ringkasan dari akumulator.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from aqi import BREAKPOINTS, CATEGORIES, POLLUTANTS, aqi_summary, build_aqi, category_codes, sub_index
+from tests.conftest import hourly_frame
+
+
+@pytest.mark.parametrize("col, concentration, expected", [
+    ("PM2.5", 0, 0), ("PM2.5", 35, 50), ("PM2.5", 55, 75), ("PM2.5", 75, 100),
+    ("PM2.5", 115, 150), ("PM2.5", 250, 300), ("PM2.5", 500, 500), ("PM2.5", 800, 500),
+    ("PM2.5", -3, 0), ("PM10", 150, 100), ("PM10", 200, 125), ("SO2", 150, 50),
+    ("NO2", 200, 100), ("CO", 10000, 100), ("O3", 160, 50), ("O3", 250, 125),
+])
+def test_sub_index_breakpoints(col, concentration, expected):
+    assert sub_index(np.array([concentration], dtype="float64"), BREAKPOINTS[col])[0] == pytest.approx(expected)
+
+
+def test_sub_index_keeps_nan():
+    assert np.isnan(sub_index(np.array([np.nan]), BREAKPOINTS["PM2.5"])).all()
+
+
+def test_category_codes_edges():
+    aqi = [0, 50, 50.5, 100, 101, 200, 300, 301, np.nan]
+    assert [CATEGORIES[c] if c >= 0 else None for c in category_codes(aqi)] == [
+        "Baik", "Baik", "Sedang", "Sedang", "Tercemar ringan", "Tercemar sedang", "Tercemar berat", "Berbahaya",
+        None]
+
+
+def test_build_aqi_takes_highest_sub_index():
+    df = pd.DataFrame({col: [np.nan] * 4 for col in POLLUTANTS})
+    df.loc[0, ["PM2.5", "PM10"]] = [75, 50]  # IAQI 100 dan 50
+    df.loc[1, ["PM2.5", "O3"]] = [20, 250]  # O3 125
+    df.loc[2, "PM2.5"] = 35  # AQI 50: tanpa polutan utama
+
+    result = build_aqi(df)
+
+    np.testing.assert_allclose(result["AQI"][:3], [100, 125, 50])
+    assert np.isnan(result["AQI"][3])
+    assert result["category"].tolist()[:3] == ["Sedang", "Tercemar ringan", "Baik"]
+    assert result["category"].isna()[3]
+    assert result["primary"].tolist()[:2] == ["PM2.5", "O3"]
+    assert result["primary"].isna()[2:].all()
+
+
+def test_aqi_summary_matches_hourly_aqi():
+    df = hourly_frame(stations=("Dongsi", "Tiantan", "Wanliu"))
+    hourly = pd.concat([df[["station", "month"]], build_aqi(df)], axis=1)
+
+    summary = aqi_summary(df, by=("station",))
+
+    expected = hourly.groupby("station")["AQI"].mean()
+    np.testing.assert_allclose(summary["AQI"], expected.loc[summary.index], rtol=1e-6)
+    counts = pd.crosstab(hourly["station"], hourly["category"]).reindex(columns=CATEGORIES, fill_value=0)
+    assert (summary[CATEGORIES].to_numpy() == counts.loc[summary.index].to_numpy()).all()
+    top = hourly.groupby("station")["primary"].agg(lambda s: s.value_counts().idxmax())
+    assert summary["primary"].tolist() == top.loc[summary.index].tolist()
@@ -0,0 +1,51 @@
+"""
+Benchmark mengukur view dari span ``@view`` di dashboard, jadi tiap fungsi view harus
+memakai dekorator itu; tanpa dekorator view itu tidak muncul di hasil benchmark.
+"""
+import ast
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmark import read_spans, view_phases
+
+ROOT = Path(__file__).resolve().parent.parent
+DASHBOARDS = sorted(ROOT.glob("dashboard*.py"))
+
+
+@pytest.mark.parametrize("path", DASHBOARDS, ids=lambda path: path.name)
+def test_dashboard_views_are_traced(path):
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    functions = {node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)}
+    # Fungsi yang dipanggil langsung di level modul (menu sidebar) dengan argumen df
+    called = {node.func.id for node in ast.walk(tree)
+              if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in functions
+              and [arg.id for arg in node.args if isinstance(arg, ast.Name)] == ["df"]}
+    views = {name for name in called if name.startswith(("visualize_", "show_"))}
+
+    assert views
+    untraced = [name for name in sorted(views)
+                if not any(isinstance(d, ast.Name) and d.id == "view" for d in functions[name].decorator_list)]
+    assert untraced == []
+
+
+def test_view_phases(tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    spans = [
+        {"view": "page", "phase": "load", "self_seconds": 0.5},
+        {"view": "visualize_map", "phase": "aggregate", "self_seconds": 0.25},
+        {"view": "visualize_map", "phase": "render", "self_seconds": 0.125},
+        {"view": "visualize_map", "phase": "serialize", "self_seconds": 0.0625},
+        {"view": "visualize_map", "phase": "view", "self_seconds": 0.0625},
+        {"view": None, "phase": "total", "self_seconds": None},
+    ]
+    trace.write_text("old\n", encoding="utf-8")
+    offset = trace.stat().st_size
+    with open(trace, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(s) + "\n" for s in spans))
+
+    assert view_phases(read_spans(trace, offset)) == {
+        "page": {"compute": 0.5, "render": 0.0},
+        "visualize_map": {"compute": 0.25, "render": 0.25},
+    }
@@ -0,0 +1,45 @@
+"""
+Akumulator korelasi (``correlation``): matriks dari akumulator, juga setelah digabung
+dengan rumus Chan, sama dengan ``DataFrame.corr`` pada data per jam.
+"""
+import numpy as np
+import pytest
+
+from correlation import build_moments, correlation_matrix, merge_moments
+from dataset import NUMERIC_COLUMNS
+from tests.conftest import hourly_frame
+
+
+def expected_corr(df):
+    return df[NUMERIC_COLUMNS].corr().to_numpy()
+
+
+def test_correlation_matrix_matches_dataframe_corr():
+    df = hourly_frame()
+    np.testing.assert_allclose(correlation_matrix(build_moments(df)).to_numpy(), expected_corr(df), atol=1e-12)
+
+
+@pytest.mark.parametrize("splits", [[1000], [300, 950, 1500]])
+def test_merged_moments_match_dataframe_corr(splits):
+    # Tiap potongan memotong grup (station, year, month) di tengah jalan
+    df = hourly_frame(stations=("Dongsi", "Tiantan", "Wanliu"))
+    bounds = [0, *splits, len(df)]
+    moments = merge_moments([build_moments(df.iloc[lo:hi]) for lo, hi in zip(bounds, bounds[1:])])
+
+    np.testing.assert_allclose(correlation_matrix(moments).to_numpy(), expected_corr(df), atol=1e-12)
+    station = df[df["station"] == "Tiantan"]
+    np.testing.assert_allclose(correlation_matrix(moments, station="Tiantan").to_numpy(),
+                               expected_corr(station), atol=1e-12)
+    month = df[(df["year"] == 2013) & (df["month"] == 3)]
+    np.testing.assert_allclose(correlation_matrix(moments, year=2013, month=3).to_numpy(),
+                               expected_corr(month), atol=1e-12)
+
+
+def test_merged_moments_equal_single_pass():
+    df = hourly_frame()
+    merged = merge_moments([build_moments(df.iloc[:700]), build_moments(df.iloc[700:])])
+    whole = build_moments(df)
+
+    assert merged["n"].tolist() == whole["n"].tolist()
+    for col in ["mean_x", "mean_y", "m2_x", "m2_y", "c_xy"]:
+        np.testing.assert_allclose(merged[col].to_numpy(), whole[col].to_numpy(), rtol=1e-9, atol=1e-9)
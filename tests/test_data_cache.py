@@ -0,0 +1,122 @@
+"""
+``fetch_cached`` terhadap file server lokal (``data_cache.mirror_server``) sebagai
+pengganti GitHub: unduhan baru, revalidasi 304, resume dari file parsial, 404 dan
+checksum yang tidak cocok.
+"""
+import email.utils
+import hashlib
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import data_cache
+from data_cache import ChecksumError, RangeRequestHandler, fetch_cached, mirror_server
+
+CONTENT = os.urandom(3 * data_cache.CHUNK_SIZE + 123)
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_cache, "CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(data_cache, "OFFLINE", False)
+    monkeypatch.setattr(data_cache, "MIRROR_DIR", None)
+    monkeypatch.setattr(data_cache, "_session", None)
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / "www"
+    root.mkdir()
+    (root / "data.bin").write_bytes(CONTENT)
+    log = []  # (status, header request) tiap jawaban server
+
+    class Handler(RangeRequestHandler):
+        def send_response(self, code, message=None):
+            log.append((code, dict(self.headers)))
+            super().send_response(code, message)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = mirror_server(root, 0, Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield SimpleNamespace(root=root, url=f"http://127.0.0.1:{httpd.server_port}/", log=log)
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_fresh_download(server):
+    path = fetch_cached(server.url + "data.bin", "data.bin")
+
+    assert path.read_bytes() == CONTENT
+    assert path.parent.name == hashlib.sha256(CONTENT).hexdigest()
+    assert [code for code, _ in server.log] == [200]
+    # Masih dalam TTL: dipakai dari cache tanpa request
+    assert fetch_cached(server.url + "data.bin", "data.bin") == path
+    assert len(server.log) == 1
+
+
+def test_revalidation_not_modified(server):
+    url = server.url + "data.bin"
+    path = fetch_cached(url, "data.bin")
+
+    assert fetch_cached(url, "data.bin", ttl=0) == path
+    code, headers = server.log[-1]
+    assert code == 304
+    assert "If-Modified-Since" in headers
+
+
+def test_resume_from_part(server):
+    url = server.url + "data.bin"
+    offset = data_cache.CHUNK_SIZE
+    part = data_cache._part_path(url)
+    part.parent.mkdir(parents=True)
+    part.write_bytes(CONTENT[:offset])
+    mtime = int(os.path.getmtime(server.root / "data.bin"))
+    part.with_suffix(".json").write_text(json.dumps({"validator": email.utils.formatdate(mtime, usegmt=True)}))
+
+    path = fetch_cached(url, "data.bin")
+
+    assert path.read_bytes() == CONTENT
+    code, headers = server.log[0]
+    assert code == 206
+    assert headers["Range"] == f"bytes={offset}-"
+    assert not part.exists() and not part.with_suffix(".json").exists()
+
+
+def test_missing_raises(server):
+    url = server.url + "missing.bin"
+    with pytest.raises(FileNotFoundError):
+        fetch_cached(url, "missing.bin")
+    assert [code for code, _ in server.log] == [404]
+
+    # 404 dicatat: selama MISSING_TTL server tidak ditanya lagi
+    with pytest.raises(FileNotFoundError):
+        fetch_cached(url, "missing.bin")
+    assert len(server.log) == 1
+
+
+def test_sha256_mismatch_on_download(server):
+    with pytest.raises(ChecksumError):
+        fetch_cached(server.url + "data.bin", "data.bin", sha256="00" * 32)
+    assert not (data_cache.CACHE_DIR / "objects").exists()
+
+
+@pytest.mark.parametrize("ttl", [data_cache.DEFAULT_TTL, 0], ids=["fresh", "not-modified"])
+def test_sha256_mismatch_on_cached_file(server, ttl):
+    url = server.url + "data.bin"
+    path = fetch_cached(url, "data.bin")
+    requests_before = len(server.log)
+
+    # Checksum yang benar: file di cache langsung dipakai
+    assert fetch_cached(url, "data.bin", sha256=hashlib.sha256(CONTENT).hexdigest()) == path
+    assert len(server.log) == requests_before
+
+    # Checksum lain: file di cache tidak dipakai, unduhan ulang juga ditolak
+    with pytest.raises(ChecksumError):
+        fetch_cached(url, "data.bin", ttl=ttl, sha256="00" * 32)
+    assert [code for code, _ in server.log[requests_before:]] == [200]
@@ -0,0 +1,119 @@
+"""
+Konversi CSV ke Parquet (``parquet_source``): file ditulis atomik, satu konversi per
+file, dan sisa konversi yang terputus dibangun ulang. Potongan waktu (``select_time``)
+sama dengan hasil mask boolean, untuk frame di memori maupun ``LazyDataset``.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+import dataset
+from dataset import (COLUMNS, LazyDataset, build_time, csv_chunks, parquet_source, read_csv_typed, select_time,
+                     sort_by_station, write_parquet_chunks)
+from tests.conftest import hourly_frame
+
+WINDOWS = [
+    (pd.Timestamp("2013-03-10 05:00"), pd.Timestamp("2013-03-25 17:00"), None),
+    (pd.Timestamp("2013-03-31 23:00"), pd.Timestamp("2013-04-02"), None),
+    (pd.Timestamp("2013-03-10"), pd.Timestamp("2013-04-05"), "Tiantan"),
+    (pd.Timestamp("2013-01-01"), pd.Timestamp("2013-03-01 01:00"), "Dongsi"),
+    (pd.Timestamp("2012-01-01"), pd.Timestamp("2013-01-01"), None),  # sebelum data
+]
+
+
+def test_parquet_source_converts_once(dataset_csv, monkeypatch):
+    calls = []
+    convert = dataset.convert
+
+    def slow_convert(*args):
+        calls.append(args)
+        time.sleep(0.2)
+        return convert(*args)
+
+    monkeypatch.setattr(dataset, "convert", slow_convert)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(parquet_source(dataset_csv))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(set(results)) == 1
+    assert len(pd.read_parquet(results[0][0])) == len(pd.read_csv(dataset_csv))
+
+
+def test_parquet_source_rebuilds_truncated_file(dataset_csv):
+    path, _ = parquet_source(dataset_csv)
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) // 2])  # konversi yang terputus di tengah
+
+    assert parquet_source(dataset_csv)[0] == path
+    assert pq.read_metadata(path).num_rows == len(pd.read_csv(dataset_csv))
+
+
+def test_write_parquet_chunks_is_atomic(dataset_csv, tmp_path):
+    target = tmp_path / "out.parquet"
+    seen = []
+
+    def chunks():
+        for chunk in csv_chunks(dataset_csv, chunksize=500):
+            seen.append(target.exists())
+            yield chunk
+
+    write_parquet_chunks(chunks(), target)
+
+    assert len(seen) > 1 and not any(seen)
+    assert pq.read_metadata(target).num_rows == len(pd.read_csv(dataset_csv))
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith("out.")] == ["out.parquet"]
+
+
+def expected_window(df, start, end, station):
+    time = build_time(df)
+    mask = ((time >= start) & (time < end)).to_numpy()
+    if station is not None:
+        mask = mask & (df["station"] == station).to_numpy()
+    return sort_by_station(df[mask])[COLUMNS]
+
+
+@pytest.fixture(params=["sorted", "shuffled"])
+def frame(request, dataset_csv):
+    df = sort_by_station(read_csv_typed(dataset_csv))
+    if request.param == "shuffled":
+        # Mis. data dengan batch ingest: baris tidak terurut per stasiun lalu waktu
+        df = df.sample(frac=1, random_state=0, ignore_index=True)
+        df.attrs = {}
+    return df
+
+
+@pytest.mark.parametrize("start, end, station", WINDOWS)
+def test_select_time_matches_mask(frame, start, end, station):
+    window = select_time(frame, start, end, station)
+
+    pd.testing.assert_frame_equal(window[COLUMNS], expected_window(frame, start, end, station))
+
+
+def test_select_time_full_range_returns_frame(frame):
+    assert select_time(frame, pd.Timestamp("2013-01-01"), pd.Timestamp("2014-01-01")) is frame
+
+
+@pytest.mark.parametrize("start, end, station", WINDOWS)
+def test_select_time_lazy_matches_mask(tmp_path, start, end, station):
+    path = tmp_path / "lazy.csv"
+    hourly_frame(stations=("Dongsi", "Tiantan", "Wanliu"), seed=7).to_csv(path, index=False)
+    df = read_csv_typed(path)
+    lazy = LazyDataset(path)
+
+    window = select_time(lazy, start, end, station)
+
+    expected = expected_window(df, start, end, station)
+    assert len(window) == len(expected)
+    pd.testing.assert_frame_equal(window.load(COLUMNS), expected, check_categorical=False)
+    stations = [station] if station is not None else ["Dongsi", "Tiantan", "Wanliu"]
+    for name in stations:
+        part = expected[expected["station"] == name].reset_index(drop=True)
+        np.testing.assert_array_equal(window.station(name)["PM2.5"].to_numpy(), part["PM2.5"].to_numpy())
@@ -0,0 +1,52 @@
+"""
+``lttb`` dan ``station_series``: titik terpilih, jumlah titik hasil dan urutan waktu.
+"""
+import numpy as np
+import pandas as pd
+
+from downsample import lttb, station_series
+from tests.conftest import hourly_frame
+
+
+def test_lttb_keeps_endpoints_and_count():
+    rng = np.random.default_rng(1)
+    x = np.arange(5000, dtype="float64")
+    y = rng.normal(size=5000)
+
+    selected = lttb(x, y, 300)
+
+    assert len(selected) == 300
+    assert selected[0] == 0 and selected[-1] == 4999
+    assert (np.diff(selected) > 0).all()
+
+
+def test_lttb_keeps_peaks():
+    x = np.arange(10_000, dtype="float64")
+    y = np.sin(x / 500)
+    y[[1234, 6789]] = [50, -50]
+
+    selected = lttb(x, y, 100)
+
+    assert {1234, 6789} <= set(selected.tolist())
+
+
+def test_lttb_small_input_returns_all_points():
+    x = np.arange(10, dtype="float64")
+    assert lttb(x, x, 10).tolist() == list(range(10))
+    assert lttb(x, x, 50).tolist() == list(range(10))
+    assert lttb(x, x, 2).tolist() == list(range(10))
+
+
+def test_station_series_sorts_backfilled_rows():
+    df = hourly_frame(stations=("Dongsi",), hours=24 * 60)
+    # Seperti batch ingest untuk jam yang lebih awal: baris hari 10-20 disimpan paling akhir
+    backfill = df.index[24 * 10:24 * 20]
+    shuffled = pd.concat([df.drop(backfill), df.loc[backfill]], ignore_index=True)
+
+    times, values = station_series(shuffled, "Dongsi", "PM2.5", 200)
+    expected_times, expected_values = station_series(df, "Dongsi", "PM2.5", 200)
+
+    assert len(times) == 200
+    assert (np.diff(times) > np.timedelta64(0)).all()
+    np.testing.assert_array_equal(times, expected_times)
+    np.testing.assert_array_equal(values, expected_values)
@@ -0,0 +1,60 @@
+"""
+Ingest (``ingest``): batch berisi (station, jam) yang sudah ada di dataset atau ganda
+di batch itu sendiri ditolak sebelum store, cube atau akumulator disentuh.
+"""
+import pandas as pd
+import pytest
+
+import ingest
+from dataset import COLUMNS, existing_rows, open_dataset, read_csv_typed
+from tests.conftest import hourly_frame
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "STORE_DIR", tmp_path / "store")
+    return tmp_path / "store"
+
+
+def write_batch(path, df):
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_overlapping_batch_is_rejected(dataset_csv, tmp_path, store):
+    # Hari terakhir dataset (2013-04-09) dan satu hari sesudahnya
+    batch = write_batch(tmp_path / "overlap.csv", hourly_frame(stations=("Dongsi",), start="2013-04-09", hours=48))
+
+    with pytest.raises(ValueError, match="24 baris"):
+        ingest.ingest_file(dataset_csv, batch)
+    assert not list(store.glob("**/*.parquet"))
+    assert ingest.open_live(dataset_csv) is open_dataset(dataset_csv)
+
+
+def test_duplicate_rows_in_batch_are_rejected(dataset_csv, tmp_path, store):
+    df = hourly_frame(stations=("Wanliu",), start="2014-01-01", hours=10)
+    batch = write_batch(tmp_path / "dupes.csv", pd.concat([df, df.iloc[:3]], ignore_index=True))
+
+    with pytest.raises(ValueError, match="3 baris"):
+        ingest.ingest_file(dataset_csv, batch)
+    assert not list(store.glob("**/*.parquet"))
+
+
+def test_ingest_pending_moves_rejected_batch(dataset_csv, tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    write_batch(drop / "overlap.csv", hourly_frame(stations=("Tiantan",), start="2013-03-05", hours=5))
+
+    assert ingest.ingest_pending(dataset_csv, drop) == []
+    assert [p.name for p in (drop / "rejected").iterdir()] == ["overlap.csv"]
+
+
+def test_existing_rows_only_marks_known_station_hours(dataset_csv):
+    current = open_dataset(dataset_csv)
+    batch = pd.concat([
+        hourly_frame(stations=("Dongsi",), start="2013-04-09 20:00", hours=8),  # 4 jam sudah ada
+        hourly_frame(stations=("Wanliu",), start="2013-03-05", hours=4),  # stasiun baru
+    ], ignore_index=True)
+    batch = read_csv_typed(write_batch(dataset_csv.parent / "batch.csv", batch[COLUMNS]))
+
+    assert existing_rows(current, batch).tolist() == [True] * 4 + [False] * 8
@@ -0,0 +1,44 @@
+"""
+Sketch kuantil (``sketch``): kuantil dari bucket berjarak paling jauh
+``RELATIVE_ACCURACY`` (relatif) dari kuantil persis, juga setelah sketch digabung.
+"""
+import numpy as np
+import pytest
+
+from sketch import RELATIVE_ACCURACY, SKETCH_COLUMNS, build_sketch, merge_sketches, quantile_name, quantiles
+from tests.conftest import hourly_frame
+
+QS = (0.1, 0.5, 0.9, 0.99)
+
+
+def exact_quantiles(df, station, col):
+    values = df.loc[df["station"] == station, col].dropna().to_numpy()
+    # Sketch memilih nilai ke-floor(q * (n - 1)) dari data terurut
+    return {q: np.quantile(values, q, method="lower") for q in QS}
+
+
+@pytest.mark.parametrize("merged", [False, True])
+def test_quantiles_within_relative_accuracy(merged):
+    df = hourly_frame(stations=("Dongsi", "Tiantan", "Wanliu"))
+    if merged:
+        half = len(df) // 2 + 7  # batas di tengah bulan dan stasiun
+        sketch = merge_sketches([build_sketch(df.iloc[:half]), build_sketch(df.iloc[half:])])
+    else:
+        sketch = build_sketch(df)
+
+    result = quantiles(sketch, "station", qs=QS)
+
+    for station in ("Dongsi", "Tiantan", "Wanliu"):
+        for col in SKETCH_COLUMNS:
+            for q, exact in exact_quantiles(df, station, col).items():
+                estimate = result.loc[station, f"{col}_{quantile_name(q)}"]
+                assert abs(estimate - exact) <= RELATIVE_ACCURACY * exact + 1e-9
+
+
+def test_merge_sketches_equals_single_sketch():
+    df = hourly_frame()
+    merged = merge_sketches([build_sketch(df.iloc[:1000]), build_sketch(df.iloc[1000:])])
+    whole = build_sketch(df)
+
+    assert merged[["station", "year", "month", "column", "key", "count"]].equals(
+        whole[["station", "year", "month", "column", "key", "count"]])
@@ -0,0 +1,210 @@
+"""
+Bangun semua artefak turunan sebelum server menerima pengguna.
+
+Tanpa langkah ini Parquet, cube, sketch kuantil, gambar, HTML peta dan posisi label
+baru dibuat saat pengguna pertama membuka view, sehingga request pertama sangat lambat. ``warm.py``
+menjalankan dashboard dengan Streamlit AppTest: view global dibuka sekali di proses
+utama (sekaligus membangun cube), lalu view per stasiun dibuka paralel di process
+pool, satu task per stasiun. Artefak disimpan di cache disk yang sama dengan yang
+dibaca dashboard (``AQ_CACHE_DIR``) dan dicatat di manifest
+``<CACHE_DIR>/artifacts/<versi dataset>.json``. Bila manifest untuk versi dataset dan
+revisi gambar yang sama sudah mencatat dashboard itu, build dilewati (kecuali ``--force``).
+
+Dipakai dari hook devcontainer atau entrypoint container::
+
+    python warm.py dashboard8.py && streamlit run dashboard8.py
+"""
+import argparse
+import importlib
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from aqi import aqi_table_path
+from correlation import moments_path
+from cube import cube_path
+from data_cache import CACHE_DIR, cached_file
+from figures import FIGURE_DIR, REVISION
+from ingest import open_live
+from label_layout import LABEL_DIR
+from sketch import sketch_path
+from summary import summary_path
+from station_map import map_path
+
+ROOT = Path(__file__).resolve().parent
+MANIFEST_DIR = CACHE_DIR / "artifacts"
+TIMEOUT = 3600  # detik per rerun AppTest
+
+# File dataset yang diunduh tiap dashboard (sumber utama lalu cadangan)
+DATA_FILES = {
+    "dashboard2.py": ["air_quality_all.csv"],
+    "dashboard3.py": ["air_quality_all.zip"],
+    "dashboard8.py": ["air_quality_all.csv"],
+}
+STATION_MENU = "Visualisasi Interaktif Stasiun"  # menu dengan pilihan stasiun di sidebar
+
+_apps = {}  # AppTest per dashboard di tiap proses worker
+
+
+def _open_app(app):
+    at = AppTest.from_file(str(ROOT / app), default_timeout=TIMEOUT)
+    _run(at)
+    return at
+
+
+def _run(at):
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+
+def app_dataset(app):
+    """
+    Dataset yang dibuka ``app``, dari file yang sudah diunduh run pertama dashboard.
+    """
+    for filename in DATA_FILES[app]:
+        path = cached_file(filename)
+        if path is not None:
+            return open_live(path)
+    raise FileNotFoundError(f"dataset {app} tidak ada di cache")
+
+
+def build_global(at):
+    """
+    Buka semua view yang tidak tergantung stasiun, berurutan di proses ini.
+    """
+    views = []
+    for menu in at.sidebar.radio[0].options:
+        if menu == STATION_MENU:
+            continue
+        at.sidebar.radio[0].set_value(menu)
+        _run(at)
+        for option in at.sidebar.selectbox[0].options:
+            at.sidebar.selectbox[0].set_value(option)
+            _run(at)
+            views.append(f"{menu} / {option}")
+            print(f"  {views[-1]}", flush=True)
+    return views
+
+
+def build_station(app, station):
+    """
+    Task process pool: buka view per stasiun untuk ``station``. AppTest disimpan per
+    proses sehingga tiap worker hanya sekali membuka dataset.
+    """
+    start = time.perf_counter()
+    at = _apps.get(app)
+    if at is None:
+        at = _apps[app] = _open_app(app)
+        at.sidebar.radio[0].set_value(STATION_MENU)
+        _run(at)
+    at.sidebar.selectbox[0].set_value(station)
+    _run(at)
+    return station, time.perf_counter() - start
+
+
+def build_stations(app, stations, workers=None):
+    # AppTest mengganti modul __main__, jadi task diambil dari modul ``warm`` agar bisa
+    # di-pickle; spawn, bukan fork, karena proses utama sudah menjalankan thread Streamlit
+    task = importlib.import_module("warm").build_station
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        futures = [pool.submit(task, app, station) for station in stations]
+        for future in as_completed(futures):
+            station, seconds = future.result()
+            print(f"  {STATION_MENU} / {station} ({seconds:.1f}s)", flush=True)
+
+
+def manifest_path(version):
+    return MANIFEST_DIR / f"{version}.json"
+
+
+def read_manifest(version):
+    try:
+        with open(manifest_path(version), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def artifact_files(version):
+    """
+    File artefak versi ``version`` di cache beserta ukurannya (path relatif ke CACHE_DIR).
+    """
+    files = [cube_path(version), sketch_path(version), summary_path(version), moments_path(version),
+             aqi_table_path(version), map_path(version), *sorted((FIGURE_DIR / version).glob(f"*-r{REVISION}.*")),
+             *sorted(LABEL_DIR.glob(f"*-{version}.json"))]
+    return {path.relative_to(CACHE_DIR).as_posix(): path.stat().st_size for path in files if path.exists()}
+
+
+def write_manifest(df, app, entry):
+    version = df.attrs["version"]
+    manifest = read_manifest(version) or {}
+    if manifest.get("revision") != REVISION:
+        manifest = {}
+    manifest = {
+        "version": version,
+        "revision": REVISION,
+        "dataset": [str(path) for path in df.files],
+        "apps": {**manifest.get("apps", {}), app: entry},
+        "artifacts": artifact_files(version),
+    }
+    MANIFEST_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=MANIFEST_DIR, suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, manifest_path(version))
+    return manifest
+
+
+def build(app, workers=None, force=False):
+    """
+    Bangun artefak untuk satu dashboard dan kembalikan manifest versi datasetnya.
+    """
+    start = time.perf_counter()
+    at = _open_app(app)  # unduh dataset dan konversi ke Parquet bila perlu
+    df = app_dataset(app)
+    version = df.attrs["version"]
+    manifest = read_manifest(version)
+    if not force and manifest and manifest["revision"] == REVISION and app in manifest["apps"]:
+        print(f"{app}: artefak versi {version} sudah ada")
+        return manifest
+
+    print(f"{app}: versi {version}", flush=True)
+    views = build_global(at)
+    stations = []
+    if STATION_MENU in at.sidebar.radio[0].options:
+        at.sidebar.radio[0].set_value(STATION_MENU)
+        _run(at)
+        stations = list(at.sidebar.selectbox[0].options)
+        build_stations(app, stations, workers)
+
+    seconds = time.perf_counter() - start
+    entry = {
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "seconds": round(seconds, 1),
+        "views": views,
+        "stations": stations,
+    }
+    manifest = write_manifest(df, app, entry)
+    print(f"{app}: {len(manifest['artifacts'])} artefak dalam {seconds:.1f}s -> {manifest_path(version)}")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bangun cache artefak dashboard sebelum server dijalankan")
+    parser.add_argument("apps", nargs="*", default=["dashboard8.py"], help=f"dashboard ({', '.join(DATA_FILES)})")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah proses untuk view per stasiun (default: jumlah CPU)")
+    parser.add_argument("--force", action="store_true", help="bangun ulang walau manifest sudah ada")
+    args = parser.parse_args()
+
+    for app in args.apps:
+        if app not in DATA_FILES:
+            parser.error(f"dashboard tidak dikenal: {app}")
+        build(app, args.workers, args.force)
@@ -0,0 +1,75 @@
+"""
+Wind rose: jumlah jam per arah angin (``wd``) dan kelas kecepatan angin (``WSPM``).
+
+Semua stasiun dihitung dalam satu pass vektor: kode kategori stasiun, kode arah
+angin dan kelas kecepatan (``np.searchsorted`` pada SPEED_EDGES) digabung menjadi
+satu indeks sel, lalu dijumlah dengan ``np.bincount``. Hasilnya array
+(stasiun x arah x kelas kecepatan) yang di-memoize per versi dataset, sehingga rose
+satu stasiun (atau semua stasiun) cukup diambil dari array itu.
+"""
+import numpy as np
+import pandas as pd
+from matplotlib import colormaps
+
+from dataset import WIND_DIRECTIONS
+from memo import memoize
+
+SPEED_EDGES = np.array([0, 1, 2, 3, 4, 6])  # m/s; kelas terakhir >= 6
+SPEED_LABELS = ["0-1", "1-2", "2-3", "3-4", "4-6", ">=6"]
+
+
+@memoize(maxsize=8, ttl=None)
+def wind_counts(df):
+    """
+    (stasiun, counts): ``counts[s, d, k]`` = jumlah jam stasiun ke-``s`` dengan arah
+    angin ``WIND_DIRECTIONS[d]`` dan kecepatan di kelas ``SPEED_LABELS[k]``. Jam tanpa
+    arah atau kecepatan tidak dihitung.
+    """
+    station = df["station"]
+    stations = station.cat.categories
+    wd = df["wd"].cat.codes.to_numpy()
+    speed = df["WSPM"].to_numpy(dtype="float64", na_value=np.nan)
+    # Kecepatan negatif (data rusak) masuk kelas pertama; NaN dibuang lewat ``valid``
+    speed_class = np.maximum(np.searchsorted(SPEED_EDGES, speed, side="right") - 1, 0)
+    valid = (wd >= 0) & ~np.isnan(speed)
+
+    shape = (len(stations), len(WIND_DIRECTIONS), len(SPEED_LABELS))
+    cells = np.ravel_multi_index((station.cat.codes.to_numpy()[valid], wd[valid], speed_class[valid]), shape)
+    counts = np.bincount(cells, minlength=np.prod(shape)).reshape(shape)
+    return stations, counts
+
+
+def rose_table(df, station=None):
+    """
+    Tabel arah angin x kelas kecepatan (jumlah jam) untuk satu stasiun, atau semua
+    stasiun bila ``station`` None.
+    """
+    stations, counts = wind_counts(df)
+    if station is None:
+        table = counts.sum(axis=0)
+    elif station in stations:
+        table = counts[stations.get_loc(station)]
+    else:
+        table = np.zeros(counts.shape[1:], dtype=counts.dtype)
+    return pd.DataFrame(table, index=pd.Index(WIND_DIRECTIONS, name="wd"), columns=SPEED_LABELS)
+
+
+def plot_wind_rose(ax, table, cmap="Oranges"):
+    """
+    Gambar rose (bar bertumpuk per kelas kecepatan, dalam persen jam) pada axes polar.
+    """
+    total = max(table.to_numpy().sum(), 1)
+    angles = np.deg2rad(np.arange(len(table)) * 360 / len(table))
+    width = 2 * np.pi / len(table) * 0.9
+    colors = colormaps[cmap](np.linspace(0.3, 1, len(table.columns)))
+
+    ax.set_theta_zero_location("N")
+    ax.set_theta_direction(-1)
+    bottom = np.zeros(len(table))
+    for label, color in zip(table.columns, colors):
+        share = table[label].to_numpy() / total * 100
+        ax.bar(angles, share, width=width, bottom=bottom, color=color, edgecolor="black", linewidth=0.3, label=f"{label} m/s")
+        bottom += share
+    ax.set_xticks(angles)
+    ax.set_xticklabels(table.index)
+    ax.yaxis.set_major_formatter(lambda v, _: f"{v:.0f}%")